@@ -0,0 +1,188 @@
+"""Magasin local d'assets adressé par contenu, partagé entre packs et exécutions.
+
+Chaque fichier téléchargé (mp3, vignette...) est rangé une seule fois sous
+blobs/<sha256[:2]>/<sha256>, et un index associe chaque URL à son empreinte.
+Deux packs qui référencent le même fichier (ex: les-odyssees et
+les-odyssees-d-alexandre-dumas) partagent donc le même blob, et une
+reconstruction de pack n'a plus besoin du réseau.
+
+La taille totale est plafonnée (TELMI_STORE_MAX_BYTES, 20 Go par défaut) :
+au-delà, les blobs les moins récemment utilisés sont supprimés. Un blob dont
+le chemin a été retourné pendant l'exécution n'est jamais supprimé par elle :
+l'appelant peut encore être en train de le lire.
+
+L'index est écrit par lots (tous les INDEX_SAVE_EVERY ajouts) et en fin
+d'exécution, plutôt qu'à chaque fichier.
+"""
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import defaultdict
+
+import http_client
+from http_cache import CACHE_DIR
+
+STORE_DIR = os.path.join(CACHE_DIR, "store")
+MAX_BYTES = int(os.environ.get("TELMI_STORE_MAX_BYTES", 20 * 1024 ** 3))
+INDEX_SAVE_EVERY = 50
+
+_lock = threading.Lock()
+_url_locks = defaultdict(threading.Lock)
+_index = None
+_dirty = False
+_unsaved_puts = 0
+_pinned = set()  # Blobs retournés pendant cette exécution, exclus de l'éviction
+
+
+def _index_path():
+    return os.path.join(STORE_DIR, "index.json")
+
+
+def _load_index():
+    global _index
+    if _index is None:
+        os.makedirs(os.path.join(STORE_DIR, "tmp"), exist_ok=True)
+        try:
+            with open(_index_path(), encoding="utf-8") as f:
+                _index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            _index = {"urls": {}, "blobs": {}}
+    return _index
+
+
+def _save_index():
+    global _dirty, _unsaved_puts
+    if _index is None:
+        return
+    tmp_path = f"{_index_path()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_index, f)
+    os.replace(tmp_path, _index_path())
+    _dirty = False
+    _unsaved_puts = 0
+
+
+@atexit.register
+def flush():
+    """Écrit l'index sur disque s'il a été modifié (dates d'utilisation comprises)."""
+    with _lock:
+        if _dirty:
+            _save_index()
+
+
+def blob_path(digest):
+    return os.path.join(STORE_DIR, "blobs", digest[:2], digest)
+
+
+def hash_file(path):
+    """Empreinte sha256 d'un fichier, lu par blocs."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _touch(digest):
+    global _dirty
+    _index["blobs"][digest]["last_used"] = time.time()
+    _pinned.add(digest)
+    _dirty = True
+
+
+def _evict():
+    """Supprime les blobs les moins récemment utilisés tant que le plafond est dépassé (sauf blobs épinglés)."""
+    blobs = _index["blobs"]
+    total = sum(blob["size"] for blob in blobs.values())
+    if total <= MAX_BYTES:
+        return
+    for digest in sorted(blobs, key=lambda d: blobs[d]["last_used"]):
+        if total <= MAX_BYTES:
+            break
+        if digest in _pinned:
+            continue
+        total -= blobs.pop(digest)["size"]
+        try:
+            os.remove(blob_path(digest))
+        except FileNotFoundError:
+            pass
+    for url in [url for url, entry in _index["urls"].items() if entry["sha256"] not in blobs]:
+        del _index["urls"][url]
+
+
+def put_file(path, url=None, headers=None):
+    """
+    Range un fichier local dans le magasin (il est déplacé, pas copié).
+
+    :param url: URL d'origine, pour retrouver le blob lors d'un prochain fetch
+    :param headers: En-têtes HTTP de la réponse, pour en garder les validateurs
+    :return: L'empreinte sha256 du contenu
+    """
+    global _dirty, _unsaved_puts
+    digest = hash_file(path)
+    target = blob_path(digest)
+    with _lock:
+        index = _load_index()
+        if os.path.exists(target):
+            os.remove(path)  # Contenu déjà présent : dédoublonnage
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        index["blobs"][digest] = {"size": os.path.getsize(target), "last_used": time.time()}
+        _pinned.add(digest)  # Jamais supprimé par l'éviction qui suit, ni avant que l'appelant l'ait lu
+        if url is not None:
+            index["urls"][url] = {
+                "sha256": digest,
+                "etag": headers.get("ETag") if headers else None,
+                "last_modified": headers.get("Last-Modified") if headers else None,
+            }
+        _evict()
+        _dirty = True
+        _unsaved_puts += 1
+        if _unsaved_puts >= INDEX_SAVE_EVERY:
+            _save_index()
+    return digest
+
+
+def fetch(url, revalidate=False):
+    """
+    Retourne le chemin du blob correspondant à url, en ne le téléchargeant qu'en cas d'absence.
+
+    :param revalidate: Vérifie auprès du serveur (ETag / Last-Modified) qu'un blob connu est toujours à jour
+    :raises http_client.DownloadError: si le téléchargement échoue
+    """
+    with _lock:
+        url_lock = _url_locks[url]
+    with url_lock:
+        with _lock:
+            entry = _load_index()["urls"].get(url)
+            known = entry is not None and os.path.exists(blob_path(entry["sha256"]))
+            if known and not revalidate:
+                _touch(entry["sha256"])
+                return blob_path(entry["sha256"])
+
+        conditional = {}
+        if known:
+            if entry.get("etag"):
+                conditional["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional["If-Modified-Since"] = entry["last_modified"]
+
+        tmp_path = os.path.join(STORE_DIR, "tmp", hashlib.sha1(url.encode("utf-8")).hexdigest())
+        headers = http_client.download(url, tmp_path, extra_headers=conditional)
+        if headers is None:
+            with _lock:
+                _touch(entry["sha256"])
+            return blob_path(entry["sha256"])
+
+        return blob_path(put_file(tmp_path, url, headers))
+
+
+def place(url, dest, revalidate=False):
+    """Copie le contenu de url (depuis le magasin) vers dest."""
+    shutil.copyfile(fetch(url, revalidate=revalidate), dest)
+    return dest
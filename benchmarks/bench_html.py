@@ -0,0 +1,123 @@
+"""Compare l'extraction des épisodes d'une page de liste Radio France selon la méthode d'analyse.
+
+Des pages synthétiques sont générées, de taille et de structure proches des
+pages réelles (scripts et données en tête, menus, liste des épisodes, pied
+de page), ou lues dans un dossier de pages enregistrées (*.html). Chaque
+page est analysée trois fois :
+- "avant" : BeautifulSoup(page, 'html.parser') sur toute la page, comme les anciens scrappers
+- "SoupStrainer" : toute la page est lue, mais seules les balises ul sont gardées dans l'arbre
+- "ciblée" : radiofrance_html.extract_episodes, qui n'analyse que le fragment de la liste
+
+Le temps est mesuré sans tracemalloc ; le pic mémoire est mesuré à part,
+pendant l'analyse de la plus grande page.
+
+Usage : python benchmarks/bench_html.py [nombre_pages | dossier_de_pages_html]
+"""
+import glob
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import radiofrance_html
+
+WORDS = "le la les un une histoire épisode voyage musée pomme odyssée grand petit nuit jour".split()
+
+
+def synthetic_page(rng, page_number, items=20):
+    """Page de liste avec l'habillage d'une page réelle autour de ul.Collection-section-items."""
+    episodes = "".join(
+        f'<li class="Collection-section-items-item"><div class="CardPodcast">'
+        f'<picture class="CardImage"><source srcset="https://www.radiofrance.fr/s3/cruiser-production/{page_number}/{index}.webp" '
+        f'type="image/webp" media="(min-width: 768px)"><source srcset="https://www.radiofrance.fr/{page_number}/{index}.jpg">'
+        f'<img src="https://www.radiofrance.fr/{page_number}/{index}.jpg" alt="" loading="lazy"></picture>'
+        f'<div class="CardDetails"><span class="CardTitle"><a href="/podcasts/{page_number}-{index}">'
+        f'{" ".join(rng.choice(WORDS) for _ in range(6)).capitalize()} &amp; {page_number}.{index}</a></span>'
+        f'<p class="CardDescription">{" ".join(rng.choice(WORDS) for _ in range(40))}</p>'
+        f'<span class="CardDate">{rng.randint(1, 28)} janvier 2024</span><button class="Play" aria-label="Écouter">'
+        f'<svg viewBox="0 0 24 24"><path d="M8 5v14l11-7z"></path></svg></button></div></div></li>'
+        for index in range(items)
+    )
+    menu = "".join(
+        f'<li class="Menu-item"><a href="/{rng.choice(WORDS)}/{index}"><span>{rng.choice(WORDS)}</span></a>'
+        f'<ul class="Menu-sub"><li><a href="/{index}/a">a</a></li><li><a href="/{index}/b">b</a></li></ul></li>'
+        for index in range(300)
+    )
+    data = ",".join(f'{{"id":{index},"title":"{rng.choice(WORDS)}","url":"/e/{index}"}}' for index in range(2000))
+    footer = "".join(f'<div class="Footer-col"><a href="/f/{index}">{rng.choice(WORDS)}</a></div>' for index in range(400))
+    return (
+        f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>Podcast</title>'
+        f'<script>window.__DATA__=[{data}];</script><style>{".c{color:red}" * 500}</style></head>'
+        f'<body><header><nav><ul class="Menu">{menu}</ul></nav></header><main><section class="Collection-section">'
+        f'<h2>Tous les épisodes</h2><ul class="Collection-section-items">{episodes}</ul></section></main>'
+        f'<footer>{footer}</footer></body></html>'
+    ).encode("utf-8")
+
+
+def load_pages(argument):
+    if argument and os.path.isdir(argument):
+        pages = []
+        for path in sorted(glob.glob(os.path.join(argument, "*.html"))):
+            with open(path, "rb") as f:
+                pages.append(f.read())
+        return pages
+    rng = random.Random(0)
+    return [synthetic_page(rng, page_number) for page_number in range(1, int(argument or 10) + 1)]
+
+
+def episodes_from_soup(soup):
+    episodes = soup.find("ul", class_="Collection-section-items")
+    return radiofrance_html._episodes_from_list(episodes) if episodes else None
+
+
+def parse_full(page):
+    return episodes_from_soup(BeautifulSoup(page, "html.parser"))
+
+
+def parse_strained(page):
+    return episodes_from_soup(BeautifulSoup(page, "html.parser", parse_only=SoupStrainer("ul")))
+
+
+def measure(pages, parse):
+    start = time.perf_counter()
+    results = [parse(page) for page in pages]
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse(max(pages, key=len))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, results
+
+
+def main():
+    pages = load_pages(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not pages:
+        print("Aucune page à analyser.")
+        return
+    print(f"{len(pages)} page(s), {sum(len(page) for page in pages) / 1024:.0f} Ko, analyseur du fragment : "
+          f"{radiofrance_html.PARSER}")
+
+    methods = {
+        "avant (html.parser)": parse_full,
+        "SoupStrainer": parse_strained,
+        "ciblée": radiofrance_html.extract_episodes,
+    }
+    results = {label: measure(pages, parse) for label, parse in methods.items()}
+    reference = results["avant (html.parser)"][2]
+    for label, (elapsed, peak, episodes) in results.items():
+        identical = "identique" if episodes == reference else "DIFFÉRENT"
+        print(f"{label:21s} {elapsed * 1000 / len(pages):8.1f} ms/page  pic {peak / 1024 / 1024:6.1f} Mo  ({identical})")
+
+    before = results["avant (html.parser)"]
+    after = results["ciblée"]
+    print(f"Extraction ciblée : {before[0] / after[0]:.0f} fois plus rapide, "
+          f"pic mémoire {before[1] / 1024 / 1024:.1f} Mo -> {after[1] / 1024 / 1024:.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare l'encodage des images d'un pack avant et après l'encodeur adapté au type d'image.
+
+Des vignettes synthétiques sont générées (photos avec bandeau de titre,
+vignettes texte de groupe), puis encodées deux fois :
+- "avant" : PNG RVB avec les réglages par défaut, comme l'ancien rendu
+- "après" : JPEG pour les photos, PNG à palette pour les vignettes texte
+
+Seul l'encodage est chronométré ; la taille totale correspond à ce qui est
+écrit dans le pack puis copié sur la carte SD.
+
+Usage : python benchmarks/bench_images.py [nombre_photos] [nombre_vignettes_texte]
+"""
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image, ImageFilter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import image_render
+
+FONT_PATH = os.path.join(ROOT, "Pacifico-Regular.ttf")
+SCREEN_SIZE = (640, 480)
+CARD_COLOR = (255, 223, 211)
+WORDS = "le la les un une histoire épisode voyage musée pomme odyssée grand petit nuit jour".split()
+
+
+def synthetic_photo(seed):
+    """Image au contenu de photo (dégradés, détails, bruit) à partir d'une fractale floutée."""
+    rng = random.Random(seed)
+    x, y = rng.uniform(-2, 0), rng.uniform(-1, 0.5)
+    fractal = Image.effect_mandelbrot((1400, 1400), (x, y, x + 1, y + 1), 64)
+    noise = Image.effect_noise((1400, 1400), 24)
+    channels = [Image.blend(fractal.filter(ImageFilter.GaussianBlur(radius)), noise, 0.15) for radius in (1, 3, 6)]
+    return Image.merge("RGB", channels)
+
+
+def title(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def encode_png(image):
+    output = BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def measure(images, encoder):
+    start = time.perf_counter()
+    total = sum(len(encoder(*args)) for args in images)
+    return time.perf_counter() - start, total
+
+
+def main():
+    photos = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    cards = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rng = random.Random(0)
+
+    sources = [synthetic_photo(seed) for seed in range(min(photos, 8))]
+    photo_images = [
+        image_render._compose(sources[index % len(sources)], SCREEN_SIZE, title(rng, 8), FONT_PATH, "height")
+        for index in range(photos)
+    ]
+    masks = [
+        image_render.draw_text_card("- " + "\n- ".join(title(rng, 5) for _ in range(8)), SCREEN_SIZE, FONT_PATH)
+        for _ in range(cards)
+    ]
+    # L'ancienne vignette texte : le même texte noir dessiné sur un fond RVB uni
+    card_images = [
+        Image.composite(Image.new("RGB", SCREEN_SIZE, CARD_COLOR), Image.new("RGB", SCREEN_SIZE, "black"), mask)
+        for mask in masks
+    ]
+
+    results = {
+        "photos avant (PNG)": measure([(image,) for image in photo_images], encode_png),
+        "photos après (JPEG)": measure([(image,) for image in photo_images], image_render.encode_photo),
+        "texte avant (PNG RVB)": measure([(image,) for image in card_images], encode_png),
+        "texte après (PNG palette)": measure([(mask, CARD_COLOR) for mask in masks], image_render.encode_card),
+    }
+    for label, (elapsed, size) in results.items():
+        print(f"{label:27s} {elapsed:7.2f} s  {size / 1024:9.0f} Ko")
+
+    before = [results["photos avant (PNG)"], results["texte avant (PNG RVB)"]]
+    after = [results["photos après (JPEG)"], results["texte après (PNG palette)"]]
+    before_time, before_size = (sum(values) for values in zip(*before))
+    after_time, after_size = (sum(values) for values in zip(*after))
+    print(f"Total : {before_size / 1024:.0f} Ko -> {after_size / 1024:.0f} Ko, "
+          f"encodage {before_time:.2f} s -> {after_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
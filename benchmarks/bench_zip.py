@@ -0,0 +1,67 @@
+"""Compare la création d'un pack zip avec et sans politique de compression par fichier.
+
+Un pack synthétique est généré (mp3 et png incompressibles, fichiers titre
+texte), puis archivé deux fois :
+- "avant" : tous les fichiers en ZIP_DEFLATED, comme l'ancien zip_folder
+- "après" : PackWriter avec le choix de méthode selon l'extension
+
+Usage : python benchmarks/bench_zip.py [nombre_episodes] [taille_mp3_ko]
+"""
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pack_writer import PackWriter
+
+
+def build_fixture(directory, episodes, mp3_kb):
+    files = []
+    for index in range(episodes):
+        episode_dir = os.path.join(directory, str(index // 8), str(index % 8))
+        os.makedirs(episode_dir, exist_ok=True)
+        for name, size in (("story.mp3", mp3_kb * 1024), ("title.png", 150 * 1024)):
+            path = os.path.join(episode_dir, name)
+            with open(path, "wb") as f:
+                f.write(os.urandom(size))
+            files.append(path)
+        path = os.path.join(episode_dir, "title.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"Épisode numéro {index}, un titre un peu long pour la synthèse vocale")
+        files.append(path)
+    return files
+
+
+def archive(files, root, zip_path, compression):
+    start = time.perf_counter()
+    with PackWriter(zip_path, compression=compression) as pack:
+        for path in files:
+            pack.write_file(os.path.relpath(path, root).replace(os.sep, "/"), path)
+    elapsed = time.perf_counter() - start
+    with zipfile.ZipFile(zip_path) as zipf:
+        assert zipf.testzip() is None
+    return elapsed, os.path.getsize(zip_path)
+
+
+def main():
+    episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    mp3_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "pack")
+        files = build_fixture(root, episodes, mp3_kb)
+        source_size = sum(os.path.getsize(path) for path in files)
+        print(f"{len(files)} fichiers, {source_size / 1024 ** 2:.1f} Mo")
+
+        before = archive(files, root, os.path.join(tmp, "avant.zip"), zipfile.ZIP_DEFLATED)
+        after = archive(files, root, os.path.join(tmp, "apres.zip"), None)
+
+    for label, (elapsed, size) in (("avant (deflate partout)", before), ("après (par extension)", after)):
+        print(f"{label:25s} {elapsed:7.2f} s  {size / 1024 ** 2:9.1f} Mo")
+    print(f"Gain de temps : x{before[0] / after[0]:.1f}, écart de taille : {(before[1] - after[1]) / 1024:.0f} Ko")
+
+
+if __name__ == "__main__":
+    main()
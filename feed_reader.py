@@ -0,0 +1,118 @@
+"""Lecture incrémentale d'un flux RSS de podcast.
+
+Contrairement à feedparser.parse, qui construit tout le flux en mémoire avant
+de rendre la main, le fichier est lu au fil de l'eau : chaque <item> est
+transformé en un Episode léger (guid, titre, url du mp3, url de l'image) puis
+libéré. Le traitement du premier épisode peut donc commencer pendant que le
+reste du flux est encore en cours de lecture.
+"""
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from itertools import chain, islice
+
+import feedparser
+
+ITUNES_NS = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+
+Channel = namedtuple("Channel", "title image_url")
+Episode = namedtuple("Episode", "guid title mp3_url image_url")
+
+
+def _text(elem):
+    return (elem.text or "").strip() if elem is not None else None
+
+
+def _episode(item):
+    mp3_url = None
+    image_url = None
+    for child in item:
+        if child.tag == "enclosure" and child.get("type") == "audio/mpeg" and mp3_url is None:
+            mp3_url = child.get("url")
+        elif child.tag == f"{ITUNES_NS}image":
+            image_url = child.get("href")
+    return Episode(_text(item.find("guid")) or None, _text(item.find("title")) or "", mp3_url, image_url)
+
+
+def _iter_items(path, events, channel_elem):
+    count = 0
+    try:
+        for event, elem in events:
+            if event == "end" and elem.tag == "item":
+                yield _episode(elem)
+                count += 1
+                # L'élément est traité : on le détache pour ne pas garder tout le flux en mémoire
+                channel_elem.remove(elem)
+    except ET.ParseError as e:
+        print(f"Flux mal formé ({e}), lecture de la suite avec feedparser.")
+        yield from islice(_from_feedparser(path)[1], count, None)
+
+
+def _from_feedparser(path):
+    """Repli pour les flux mal formés que l'analyseur XML strict refuse."""
+    feed = feedparser.parse(path)
+    channel = Channel(feed.feed.get("title", ""), feed.feed.image.get("href") if "image" in feed.feed else None)
+    episodes = (
+        Episode(
+            entry.get("id"),
+            entry.get("title", ""),
+            next((link.href for link in entry.get("links", []) if link.get("type") == "audio/mpeg"), None),
+            entry.get("image", {}).get("href"),
+        )
+        for entry in feed.entries
+    )
+    return channel, episodes
+
+
+def open_feed(path):
+    """
+    Ouvre un flux RSS et lit ses informations générales.
+
+    :param path: Chemin du fichier XML du flux
+    :return: (Channel, itérateur d'Episode dans l'ordre du flux)
+    """
+    events = ET.iterparse(path, events=("start", "end"))
+    channel_elem = None
+    title = None
+    image_url = None
+    depth = 0
+    try:
+        for event, elem in events:
+            if event == "end":
+                depth -= 1
+            if event == "start" and elem.tag == "channel":
+                channel_elem = elem
+                channel_depth = depth
+            elif event == "start" and elem.tag == "item":
+                break  # Les informations du podcast précèdent les épisodes
+            elif event == "end" and channel_elem is not None and depth == channel_depth + 1:
+                if elem.tag == "title":
+                    title = _text(elem)
+                elif elem.tag == f"{ITUNES_NS}image":
+                    image_url = elem.get("href")
+                elif elem.tag == "image" and image_url is None:
+                    image_url = _text(elem.find("url"))
+            if event == "start":
+                depth += 1
+    except ET.ParseError:
+        return _from_feedparser(path)
+
+    if channel_elem is None:
+        return _from_feedparser(path)
+    return Channel(title or "", image_url), _iter_items(path, events, channel_elem)
+
+
+def peek(iterable, count):
+    """Lit les count premiers éléments et retourne (tête, itérateur complet)."""
+    iterator = iter(iterable)
+    head = list(islice(iterator, count))
+    return head, chain(head, iterator)
+
+
+def batched(iterable, size):
+    """Découpe un itérable en listes de size éléments, sans le matérialiser en entier."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
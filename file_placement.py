@@ -0,0 +1,125 @@
+"""Placement des gros fichiers (mp3) dans l'arborescence d'un pack, sans copie quand c'est possible.
+
+Les stratégies sont essayées dans l'ordre, la première qui réussit est gardée :
+- "hardlink" : lien physique, instantané et sans espace disque en plus
+  (source et pack sur le même système de fichiers)
+- "reflink" : clone copy-on-write (ioctl FICLONE, btrfs / xfs), les deux
+  fichiers restent indépendants
+- "copy_range" : copie dans le noyau (os.copy_file_range, ou os.sendfile)
+- "copy" : copie classique par blocs
+
+La stratégie de départ se choisit par exécution (configure() ou la variable
+TELMI_PLACEMENT) ; "auto" commence par le lien physique. Une stratégie qui
+échoue entre deux systèmes de fichiers n'est plus retentée pour eux.
+"""
+import errno
+import os
+import shutil
+import threading
+from collections import Counter
+
+STRATEGIES = ("hardlink", "reflink", "copy_range", "copy")
+FICLONE = 0x40049409  # _IOW(0x94, 9, int)
+
+# Erreurs signifiant « stratégie non disponible ici », mémorisées par couple de périphériques ;
+# les erreurs de droits (EACCES, EPERM) font seulement passer à la stratégie suivante
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.ENOSYS, errno.EMLINK, errno.EINVAL}
+
+default_strategy = os.environ.get("TELMI_PLACEMENT", "auto")
+used = Counter()
+_unsupported = set()
+_lock = threading.Lock()
+
+
+def configure(strategy=None):
+    """Choisit la stratégie de départ ("auto" ou l'une de STRATEGIES)."""
+    global default_strategy
+    if strategy is not None:
+        if strategy != "auto" and strategy not in STRATEGIES:
+            raise ValueError(f"Stratégie de placement inconnue : {strategy} (disponibles : auto, {', '.join(STRATEGIES)})")
+        default_strategy = strategy
+
+
+def _hardlink(src, dst):
+    os.link(src, dst)
+
+
+def _reflink(src, dst):
+    import fcntl  # Indisponible sous Windows : ImportError, stratégie suivante
+
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+
+
+def _copy_range(src, dst):
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        remaining = os.fstat(source.fileno()).st_size
+        offset = 0
+        use_sendfile = not hasattr(os, "copy_file_range")
+        while remaining > 0:
+            if use_sendfile:
+                copied = os.sendfile(target.fileno(), source.fileno(), offset, remaining)
+            else:
+                try:
+                    copied = os.copy_file_range(source.fileno(), target.fileno(), remaining)
+                except OSError as e:
+                    # copy_file_range refusé entre deux systèmes de fichiers (noyaux anciens) : sendfile
+                    if offset or e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                        raise
+                    use_sendfile = True
+                    continue
+            if copied == 0:
+                raise OSError(errno.EIO, f"Copie interrompue : {src}")
+            offset += copied
+            remaining -= copied
+
+
+def _copy(src, dst):
+    shutil.copyfile(src, dst)
+
+
+_FUNCTIONS = {"hardlink": _hardlink, "reflink": _reflink, "copy_range": _copy_range, "copy": _copy}
+
+
+def _devices(src, dst):
+    return os.stat(src).st_dev, os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+
+
+def place(src, dst, strategy=None):
+    """
+    Place le contenu de src en dst (remplacé s'il existe).
+
+    :param strategy: Stratégie de départ ; par défaut celle choisie par configure()
+    :return: Le nom de la stratégie utilisée
+    """
+    strategy = strategy or default_strategy
+    candidates = STRATEGIES if strategy == "auto" else STRATEGIES[STRATEGIES.index(strategy):]
+    devices = _devices(src, dst)
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    for name in candidates:
+        if (name, devices) in _unsupported and name != "copy":
+            continue
+        try:
+            _FUNCTIONS[name](src, dst)
+        except (OSError, ImportError, AttributeError) as e:
+            if os.path.lexists(dst):
+                os.remove(dst)  # Ne pas laisser de fichier partiel
+            if name == "copy":
+                raise  # Dernière stratégie : l'erreur (droits compris) est celle du fichier
+            # EPERM / EACCES (pas de liens physiques sur vfat/exFAT, fs.protected_hardlinks...) :
+            # stratégie suivante, sans la marquer indisponible pour ce couple de périphériques
+            if not isinstance(e, OSError) or e.errno in UNSUPPORTED_ERRNOS:
+                with _lock:
+                    _unsupported.add((name, devices))
+            continue
+        with _lock:
+            used[name] += 1
+        return name
+
+
+def summary():
+    """Résumé des stratégies utilisées depuis le début de l'exécution."""
+    details = ", ".join(f"{count} par {name}" for name, count in used.items()) or "aucun fichier"
+    return f"Placement des fichiers : {details}"
@@ -0,0 +1,95 @@
+"""Cache HTTP persistant basé sur les validateurs ETag / Last-Modified.
+
+Pour chaque URL on garde une copie locale du contenu et les validateurs
+renvoyés par le serveur. Aux exécutions suivantes la requête est envoyée
+avec If-None-Match / If-Modified-Since : si le serveur répond 304, la copie
+locale est réutilisée sans rien re-télécharger.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+
+import http_client
+
+CACHE_DIR = os.environ.get(
+    "TELMI_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "telmi-podcast-pack"),
+)
+
+_lock = threading.Lock()
+_index = None
+# Un verrou par URL : deux épisodes partageant la même image ne la téléchargent qu'une fois
+_url_locks = defaultdict(threading.Lock)
+
+
+def _http_dir():
+    return os.path.join(CACHE_DIR, "http")
+
+
+def _index_path():
+    return os.path.join(_http_dir(), "validators.json")
+
+
+def _load_index():
+    global _index
+    if _index is None:
+        os.makedirs(_http_dir(), exist_ok=True)
+        try:
+            with open(_index_path(), encoding="utf-8") as f:
+                _index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            _index = {}
+    return _index
+
+
+def _save_index():
+    tmp_path = f"{_index_path()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_index, f)
+    os.replace(tmp_path, _index_path())
+
+
+def cached_path(url):
+    """Chemin de la copie locale associée à une URL."""
+    return os.path.join(_http_dir(), hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+
+def fetch(url):
+    """
+    Retourne le chemin local du contenu de url, en ne le téléchargeant que s'il a changé.
+
+    :return: (chemin local, True si le contenu a été (re)téléchargé)
+    :raises http_client.DownloadError: si le téléchargement échoue
+    """
+    with _lock:
+        url_lock = _url_locks[url]
+    with url_lock:
+        return _fetch(url)
+
+
+def _fetch(url):
+    path = cached_path(url)
+    with _lock:
+        entry = dict(_load_index().get(url, {}))
+
+    conditional = {}
+    if os.path.exists(path):
+        if entry.get("etag"):
+            conditional["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            conditional["If-Modified-Since"] = entry["last_modified"]
+
+    headers = http_client.download(url, path, extra_headers=conditional)
+    if headers is None:
+        return path, False
+
+    with _lock:
+        index = _load_index()
+        index[url] = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+        _save_index()
+    return path, True
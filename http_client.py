@@ -0,0 +1,229 @@
+"""Client HTTP partagé par les scripts de téléchargement et les scrappers.
+
+Une seule session requests est créée par processus : les connexions TCP/TLS
+vers les CDN (Radio France, Ausha, Bayard...) sont gardées ouvertes et
+réutilisées d'un fichier à l'autre au lieu d'être renégociées à chaque appel.
+"""
+import os
+import re
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connexion, lecture) en secondes
+DEFAULT_TIMEOUT = (10, 60)
+
+# Nombre d'hôtes différents gardés en cache, et connexions keep-alive par hôte
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 16
+
+DEFAULT_HEADERS = {
+    "User-Agent": "telmi-podcast-pack (+https://github.com/fatruc/telmi-podcast-pack)",
+    "Accept": "*/*",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Taille des blocs écrits sur disque et nombre de reprises après une coupure
+CHUNK_SIZE = 64 * 1024
+MAX_ATTEMPTS = 5
+
+_session = None
+_lock = threading.Lock()
+_host_pool_sizes = {}
+
+
+class DownloadError(requests.RequestException):
+    """Téléchargement impossible à terminer ou fichier incomplet."""
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """Adaptateur qui applique un timeout par défaut à toutes les requêtes."""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _make_adapter(pool_maxsize):
+    retries = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    return TimeoutHTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize,
+        max_retries=retries,
+    )
+
+
+def _mount_host(session, host, pool_maxsize):
+    for scheme in ("https", "http"):
+        session.mount(f"{scheme}://{host}/", _make_adapter(pool_maxsize))
+
+
+def get_session():
+    """Retourne la session partagée, créée au premier appel."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                session.mount("https://", _make_adapter(POOL_MAXSIZE))
+                session.mount("http://", _make_adapter(POOL_MAXSIZE))
+                for host, pool_maxsize in _host_pool_sizes.items():
+                    _mount_host(session, host, pool_maxsize)
+                _session = session
+    return _session
+
+
+def configure(pool_maxsize=None, host_pool_sizes=None):
+    """
+    Ajuste la taille des pools de connexions.
+
+    :param pool_maxsize: Nombre de connexions gardées par hôte (par défaut pour tous les hôtes)
+    :param host_pool_sizes: Dictionnaire {hôte: taille} pour dimensionner certains hôtes à part
+    """
+    global POOL_MAXSIZE, _session
+    with _lock:
+        if pool_maxsize is not None:
+            POOL_MAXSIZE = pool_maxsize
+        if host_pool_sizes:
+            _host_pool_sizes.update(host_pool_sizes)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get(url, **kwargs):
+    """Équivalent de requests.get passant par la session partagée."""
+    return get_session().get(url, **kwargs)
+
+
+def _total_from_response(response, offset):
+    """Taille complète attendue du fichier, ou None si le serveur ne la donne pas."""
+    if response.status_code == 206:
+        match = re.match(r"bytes (\d+)-\d+/(\d+|\*)", response.headers.get("Content-Range", ""))
+        if not match or int(match.group(1)) != offset:
+            raise DownloadError(f"Réponse partielle inattendue : {response.headers.get('Content-Range')}")
+        if match.group(2) != "*":
+            return int(match.group(2))
+    length = response.headers.get("Content-Length")
+    if length is None:
+        return None
+    return int(length) + (offset if response.status_code == 206 else 0)
+
+
+def _validator(headers):
+    """Validateur utilisable dans If-Range : ETag fort, sinon Last-Modified."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _read_validator(validator_path):
+    try:
+        with open(validator_path, encoding="utf-8") as f:
+            return f.read() or None
+    except FileNotFoundError:
+        return None
+
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def download(url, path, max_attempts=MAX_ATTEMPTS, extra_headers=None):
+    """
+    Télécharge url vers path en passant par un fichier path.part.
+
+    En cas de coupure, le téléchargement reprend là où il s'était arrêté grâce
+    à l'en-tête Range, accompagné de If-Range avec le validateur (ETag ou
+    Last-Modified) de la réponse qui a commencé le .part : si le fichier
+    distant a changé entre-temps, le serveur renvoie tout le fichier au lieu
+    de la suite de l'ancien. Un .part sans validateur est recommencé.
+
+    La taille finale est comparée au Content-Length, puis le fichier est
+    renommé atomiquement : path n'existe donc jamais tronqué.
+
+    :param extra_headers: En-têtes ajoutés à la première requête (ex: If-None-Match)
+    :return: Les en-têtes de la réponse, ou None si le serveur a répondu 304
+    :raises DownloadError: si le fichier n'a pas pu être téléchargé en entier
+    """
+    part_path = f"{path}.part"
+    validator_path = f"{part_path}.validator"
+    last_error = None
+
+    for _ in range(max_attempts):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = _read_validator(validator_path) if offset else None
+        if offset and validator is None:
+            # Impossible de vérifier que le .part vient du même fichier distant : on repart de zéro
+            _remove(part_path)
+            offset = 0
+        # identity : la taille reçue doit correspondre au Content-Length annoncé
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        elif extra_headers:
+            headers.update(extra_headers)
+
+        try:
+            with get(url, stream=True, headers=headers) as response:
+                if response.status_code == 304:
+                    return None
+                if response.status_code == 416:
+                    # Le .part ne correspond plus au fichier distant : on repart de zéro
+                    if offset:
+                        _remove(part_path, validator_path)
+                        continue
+                response.raise_for_status()
+                if response.status_code == 200:
+                    offset = 0  # Range ignoré par le serveur, ou fichier distant modifié (If-Range)
+                expected = _total_from_response(response, offset)
+                response_headers = response.headers
+                if offset == 0:
+                    # Validateur du nouveau .part, pour une reprise éventuelle
+                    new_validator = _validator(response_headers)
+                    if new_validator:
+                        with open(validator_path, "w", encoding="utf-8") as f:
+                            f.write(new_validator)
+                    else:
+                        _remove(validator_path)
+
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            last_error = e
+            continue
+
+        size = os.path.getsize(part_path)
+        if expected is not None and size < expected:
+            last_error = DownloadError(f"{size}/{expected} octets reçus")
+            continue
+        if expected is not None and size > expected:
+            _remove(part_path, validator_path)
+            raise DownloadError(f"Fichier plus grand qu'annoncé ({size} > {expected}) : {url}")
+
+        os.replace(part_path, path)
+        _remove(validator_path)
+        return response_headers
+
+    raise DownloadError(f"Téléchargement interrompu de {url} : {last_error}")
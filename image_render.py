@@ -0,0 +1,284 @@
+"""Rendu des vignettes du pack (redimensionnement, bandeau de titre, vignettes texte).
+
+Les fonctions de rendu sont de simples fonctions de module, sans état, pour
+pouvoir être exécutées dans un pool de processus : le redimensionnement
+LANCZOS et la composition du texte occupent alors tous les cœurs au lieu
+d'un seul. Chaque processus du pool charge les polices une seule fois au
+démarrage.
+
+Les sources JPEG sont réduites dès le décodage (draft) au double de la plus
+grande taille demandée, et une même source décodée une fois peut produire
+plusieurs tailles (couverture, titre principal, titre du choix).
+
+Les rendus retournés sous forme de contenu sont mémorisés dans render_cache :
+une image déjà rendue avec les mêmes paramètres est reprise telle quelle,
+sans passer par PIL.
+
+L'encodage dépend du type d'image : les photos (vignettes d'épisode, de
+podcast) sont encodées en JPEG, les vignettes texte (fond uni et texte noir)
+en PNG à palette de quelques niveaux, beaucoup plus petit qu'un PNG RVB.
+"""
+import inspect
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+import render_cache
+import text_layout
+
+# Tailles de police utilisées par les vignettes (recherche de taille comprise)
+WARM_FONT_SIZES = range(10, 37)
+
+# À incrémenter quand le rendu change, pour ne pas reprendre d'anciennes images du cache
+RENDER_VERSION = 2
+
+# Extension des fichiers produits par chaque encodeur
+PHOTO_EXTENSION = ".jpg"
+CARD_EXTENSION = ".png"
+
+# Paramètres des fonctions de rendu qui désignent des fichiers : le cache de rendu
+# les identifie par leur contenu, les autres paramètres par leur valeur
+PATH_PARAMETERS = ("input_path", "font_path")
+
+JPEG_QUALITY = 88
+# Niveaux de gris du texte des vignettes texte (taille de la palette)
+CARD_LEVELS = 16
+
+
+def encode_photo(image):
+    """Encode une photo en JPEG (qualité JPEG_QUALITY, tables de Huffman optimisées)."""
+    output = BytesIO()
+    image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def encode_card(mask, background_color):
+    """
+    Encode une vignette texte en PNG à palette.
+
+    :param mask: Image "L" du texte (0 pour le texte, 255 pour le fond)
+    :param background_color: Couleur du fond ; la palette va du noir à cette couleur
+    """
+    top = CARD_LEVELS - 1
+    levels = mask.point(lambda value: round(value * top / 255))
+    card = Image.frombytes("P", levels.size, levels.tobytes())
+    card.putpalette([round(channel * level / top) for level in range(CARD_LEVELS) for channel in background_color])
+    output = BytesIO()
+    card.save(output, format="PNG")
+    return output.getvalue()
+
+
+def _output(data, output_path):
+    """Écrit le contenu encodé dans output_path, ou le retourne si output_path est None."""
+    if output_path is not None:
+        with open(output_path, "wb") as f:
+            f.write(data)
+        return None
+    return data
+
+
+def draw_banner(background, size, text, font_path):
+    """Ajoute le titre dans un cadre semi-transparent en bas de l'image."""
+    draw = ImageDraw.Draw(background)
+    padding = 10
+
+    # Plus grande taille (36 au plus) pour laquelle le titre tient sur le tiers bas de l'image
+    layout = text_layout.fit_text(text, font_path, size[0] - 2 * padding, size[1] // 3, max_size=36, min_size=16)
+    font = layout.font
+    wrapped_text = "\n".join(layout.lines)
+
+    # Calculer la taille du texte
+    bbox = draw.textbbox((0, 0), wrapped_text, font=font, align="center")
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    box_width = size[0]
+    box_height = text_height + padding * 2
+
+    # Créer un cadre semi-transparent
+    transparency = 200
+    box = Image.new("RGBA", (box_width, box_height), (255, 255, 255, transparency))
+
+    # Ajouter le cadre à l'image
+    box_x = size[0] // 2 - box_width // 2
+    box_y = size[1] - box_height - 20
+    background.paste(box, (box_x, box_y), box)
+
+    # Ajouter le texte centré dans le cadre
+    text_x = size[0] // 2 - text_width // 2
+    text_y = box_y
+    draw.text((text_x, text_y), wrapped_text, fill="black", font=font, align="center")
+
+
+def open_reduced(input_path, size):
+    """
+    Ouvre une image en ne décodant que la résolution nécessaire pour produire size.
+
+    Pour un JPEG, le décodeur réduit directement l'image d'un facteur 2, 4 ou 8
+    (en restant au moins au double de size, ce qui garde la qualité du LANCZOS
+    final) : une vignette de 3000 px n'est jamais décodée en pleine taille.
+    """
+    img = Image.open(input_path)
+    if img.format == "JPEG":
+        img.draft("RGB", (size[0] * 2, size[1] * 2))
+    return img
+
+
+def _compose(img, size, text, font_path, fit):
+    img_ratio = img.width / img.height
+    if fit == "contain" and img_ratio > size[0] / size[1]:
+        # L'image est plus large que le cadre cible : ajuster en largeur
+        new_width = size[0]
+        new_height = int(size[0] / img_ratio)
+    else:
+        new_height = size[1]
+        new_width = int(size[1] * img_ratio)
+    # reducing_gap : les grosses sources non JPEG sont d'abord réduites par Image.reduce
+    resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    # Centrer l'image sur un fond noir
+    background = Image.new("RGB", size, (0, 0, 0))
+    background.paste(resized, ((size[0] - new_width) // 2, (size[1] - new_height) // 2))
+
+    if text is not None:
+        draw_banner(background, size, text, font_path)
+    return background
+
+
+def render_resized_many(input_path, targets, font_path):
+    """
+    Décode une source une seule fois et en produit plusieurs tailles.
+
+    :param targets: Liste de (taille, texte, fit, output_path)
+    :return: La liste des résultats, dans l'ordre de targets (voir render_resized)
+    """
+    largest = (max(size[0] for size, *_ in targets), max(size[1] for size, *_ in targets))
+    with open_reduced(input_path, largest) as img:
+        img.load()
+        return [
+            _output(encode_photo(_compose(img, size, text, font_path, fit)), output_path)
+            for size, text, fit, output_path in targets
+        ]
+
+
+def render_resized(input_path, size, text, font_path, fit="height", output_path=None):
+    """
+    Redimensionne une image sur un fond noir de la taille cible, avec un titre éventuel.
+
+    :param fit: "height" ajuste la hauteur de l'image à celle du cadre,
+                "contain" fait tenir l'image entière dans le cadre
+    :param output_path: Fichier de sortie (PHOTO_EXTENSION) ; sans lui, le contenu JPEG est retourné
+    """
+    return render_resized_many(input_path, [(size, text, fit, output_path)], font_path)[0]
+
+
+def draw_text_card(text, size, font_path):
+    """Dessine le texte d'une vignette texte ; retourne le masque "L" (texte noir sur fond blanc)."""
+    mask = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(mask)
+    margin = 19
+    available_height = size[1] - 2 * margin
+
+    # Plus grande taille de police pour laquelle le texte, re-découpé, tient dans la vignette
+    layout = text_layout.fit_text(text, font_path, size[0] - 2 * margin, available_height, max_size=36)
+    total_text_height = layout.line_height * len(layout.lines)
+
+    # Calcule l'espacement vertical entre les lignes
+    spacing = (available_height - total_text_height) / (len(layout.lines) + 1)
+    y_offset = margin
+
+    # Dessine le texte sur l'image
+    for line in layout.lines:
+        draw.text((margin, y_offset), line, font=layout.font, fill=0)
+        y_offset += layout.line_height + spacing
+
+    return mask
+
+
+def render_text_card(text, background_color, size, font_path, output_path=None):
+    """
+    Vignette unie portant un texte (liste des épisodes d'un groupe par exemple).
+
+    :param output_path: Fichier de sortie (CARD_EXTENSION) ; sans lui, le contenu PNG est retourné
+    """
+    return _output(encode_card(draw_text_card(text, size, font_path), background_color), output_path)
+
+
+def _warm_fonts(font_path):
+    # Simple préchargement : sans la police, les redimensionnements sans texte doivent rester possibles,
+    # et les rendus avec texte échoueront individuellement avec l'erreur d'ouverture
+    try:
+        for size in WARM_FONT_SIZES:
+            text_layout.get_font(font_path, size)
+    except OSError:
+        pass
+
+
+class RenderPool:
+    """
+    Pool de processus dédié au rendu des images, avec suivi des rendus en cours.
+
+    Les rendus sans output_path passent par le cache de rendu : seuls ceux qui
+    n'y sont pas encore sont envoyés aux processus.
+    """
+
+    def __init__(self, font_path, max_workers=None):
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            initializer=_warm_fonts,
+            initargs=(font_path,),
+        )
+        self.jobs = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # submit() peut être appelé depuis plusieurs threads (téléchargements en parallèle)
+        self.lock = threading.Lock()
+
+    def submit(self, label, fn, *args, **kwargs):
+        """Planifie un rendu ; label identifie le rendu dans le résultat de wait()."""
+        cache_key = None
+        arguments = inspect.signature(fn).bind(*args, **kwargs).arguments
+        if arguments.get("output_path") is None:
+            cache_key = render_cache.render_key(f"{fn.__name__}/{RENDER_VERSION}", arguments, PATH_PARAMETERS)
+            cached = render_cache.get(cache_key)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                with self.lock:
+                    self.cache_hits += 1
+                    self.jobs.append((label, future, None))
+                return future
+        future = self.executor.submit(fn, *args, **kwargs)
+        with self.lock:
+            if cache_key is not None:
+                self.cache_misses += 1
+            self.jobs.append((label, future, cache_key))
+        return future
+
+    def wait(self):
+        """
+        Attend la fin de tous les rendus planifiés.
+
+        :return: Liste de (label, résultat) et liste de (label, erreur)
+        """
+        results = []
+        errors = []
+        with self.lock:
+            jobs, self.jobs = self.jobs, []
+        if self.cache_hits:
+            print(f"Images reprises du cache de rendu : {self.cache_hits}, rendues : {self.cache_misses}")
+        for label, future, cache_key in jobs:
+            try:
+                result = future.result()
+                if cache_key is not None:
+                    render_cache.put(cache_key, result)
+                results.append((label, result))
+            except Exception as e:
+                print(f"Erreur lors du rendu de l'image {label} : {e}")
+                errors.append((label, e))
+        return results, errors
+
+    def shutdown(self):
+        self.executor.shutdown()
@@ -1,6 +1,6 @@
 import os
-import shutil
-import requests
+import http_client
+import file_placement
 from mutagen.mp3 import MP3
 from mutagen.id3 import ID3, APIC
 from PIL import Image
@@ -45,10 +45,10 @@ for index, file_name in enumerate(mp3_files):
     target_folder = os.path.join(source_folder, str(index))
     os.makedirs(target_folder, exist_ok=True)
 
-    # Copier et renommer le fichier MP3 dans le dossier
+    # Placer le fichier MP3 dans le dossier (lien physique ou clone si possible, sinon copie)
     source_file_path = os.path.join(source_folder, file_name)
     target_file_path = os.path.join(target_folder, 'story.mp3')
-    shutil.copy2(source_file_path, target_file_path)
+    file_placement.place(source_file_path, target_file_path)
 
     # Créer le fichier title.txt avec le titre
     title_file_path = os.path.join(target_folder, 'title.txt')
@@ -60,7 +60,7 @@ for index, file_name in enumerate(mp3_files):
     image_url = f"{image_base_url}/{code}/{code}_Couv.png"
 
     try:
-        response = requests.get(image_url, stream=True)
+        response = http_client.get(image_url, stream=True)
         if response.status_code == 200:
             image_data = BytesIO(response.content)  # Charger les données de l'image dans un objet BytesIO
             create_canvas_with_image(image_data, image_path)
@@ -73,4 +73,5 @@ for index, file_name in enumerate(mp3_files):
         image_data = default_image_path
         create_canvas_with_image(image_data, image_path)
 
+print(file_placement.summary())
 print("Traitement terminé. Les dossiers ont été créés.")
@@ -1,15 +1,19 @@
 import os
-import shutil
-import requests
-import feedparser
 import unicodedata
 import re
 import sys
+import json
+import hashlib
 import zipfile
-from PIL import Image, ImageDraw, ImageFont
-import csv
-from gtts import gTTS  # Importer gTTS pour la synthèse vocale
-import textwrap
+from concurrent.futures import ThreadPoolExecutor
+import http_client
+import http_cache
+import asset_store
+from pack_writer import PackWriter
+import feed_reader
+import image_render
+import tts_cache
+from title_mapping import MappingFile
 
 class PodcastDownloader:
     # Variables de classe
@@ -20,6 +24,8 @@ class PodcastDownloader:
     disable_grouping = False
     add_episode_title = False
     csv_only = False
+    max_workers = 8
+    render_workers = None  # Nombre de processus de rendu d'images (par défaut : un par cœur)
     font_path="Pacifico-Regular.ttf"
 
     screen_size = (640, 480)
@@ -32,29 +38,33 @@ class PodcastDownloader:
     ]
 
     main_dir = None
-    mapping_cache = None
+    mapping_cache = None  # Correspondance des titres (MappingFile), écrite en fin d'exécution
+    traductions = {}
+    pack = None
+    executor = None
+    download_jobs = []
+    render_pool = None
+    pending_resizes = {}
+
+    # Reconstruction incrémentale : manifeste du pack précédent et éléments du pack en cours
+    manifest_name = "manifest.json"
+    previous_pack = None
+    previous_manifest = None
+    previous_groups = {}
+    manifest_entries = []
+    failed_idents = set()  # Éléments (guid, dossier de groupe, "main", "choice") incomplets, hors manifeste
     
     @classmethod
     def charger_mapping(self):
-        chemin_fichier = f"{self.main_dir}.csv"
-        
         if self.mapping_cache is None:
-            try:
-                with open(chemin_fichier, mode="r", encoding="utf-8-sig") as fichier_csv:
-                    dialect = csv.Sniffer().sniff(fichier_csv.read(1024))
-                    fichier_csv.seek(0)
-                    lecteur = csv.reader(fichier_csv, delimiter=dialect.delimiter)
-                    self.mapping_cache = {ligne[0]: ligne[1] for ligne in lecteur if len(ligne) >= 2}
-            except FileNotFoundError:
-                self.mapping_cache = {}
-            except Exception as e:
-                print(f"Erreur lors du chargement du fichier : {e}")
-                self.mapping_cache = {}
+            self.mapping_cache = MappingFile(f"{self.main_dir}.csv")
 
     @classmethod
     def traduire(self, chaine):
-    
-        chemin_fichier = f"{self.main_dir}.csv"
+        # Un même titre est traduit plusieurs fois (liste du groupe, épisode) : le résultat est mémorisé
+        if chaine in self.traductions:
+            return self.traductions[chaine]
+
         title = self.clean_string(chaine)
         safe_title = "".join(x for x in title if x.isalnum() or x in (" ", "_")).rstrip()
             
@@ -63,20 +73,23 @@ class PodcastDownloader:
         
         # Vérifier si la chaîne est dans le mapping
         if safe_title in self.mapping_cache:
-            return self.mapping_cache[safe_title]
-        
-        # Si la chaîne n'est pas trouvée, l'ajouter au fichier CSV et au cache
-        try:
-            with open(chemin_fichier, mode="a", encoding="utf-8-sig", newline='') as fichier_csv:
-                writer = csv.writer(fichier_csv, delimiter=';')
-                writer.writerow([safe_title, title])  # Ajouter la chaîne dans les deux colonnes
-                
-                # Ajouter au self.mapping_cache
-                self.mapping_cache[safe_title] = title
-        except Exception as e:
-            print(f"Erreur lors de l'ajout au fichier CSV : {e}")
-        
-        return title  # Retourner la chaîne d'origine si elle n'est pas trouvée
+            traduction = self.mapping_cache.get(safe_title)
+        else:
+            # Si la chaîne n'est pas trouvée, l'ajouter au mapping (écrit dans le fichier CSV en fin d'exécution)
+            self.mapping_cache.add(safe_title, title)
+            traduction = title  # Retourner la chaîne d'origine si elle n'est pas trouvée
+
+        self.traductions[chaine] = traduction
+        return traduction
+
+    @classmethod
+    def enregistrer_mapping(self):
+        """Écrit en une fois les nouvelles lignes du fichier de correspondance des titres."""
+        if self.mapping_cache is not None:
+            try:
+                self.mapping_cache.flush()
+            except Exception as e:
+                print(f"Erreur lors de l'ajout au fichier CSV : {e}")
 
     @staticmethod
     def nombre_en_lettres(n):
@@ -112,21 +125,6 @@ class PodcastDownloader:
         
         return unite[n]
 
-    @classmethod
-    def zip_folder(self):
-        try:
-            zip_path = f"{self.main_dir}.zip"
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(self.main_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, self.main_dir)
-                        zipf.write(file_path, arcname)
-            print(f"Dossier zippé avec succès : {zip_path}")
-        except Exception as e:
-            print(f"Erreur lors de la création du fichier zip : {e}")
-    
-        
     @staticmethod
     def clean_filename(title):
         nfkd_form = unicodedata.normalize('NFKD', title)
@@ -144,272 +142,380 @@ class PodcastDownloader:
         return re.sub(r'[^a-zA-Z0-9\sÀ-ÿ,\'-]', '', s)
 
     @classmethod
-    def download_file(self, url, filename):
+    def download_file(self, url, revalidate=False):
+        """Retourne le chemin local du fichier (magasin d'assets), ou None en cas d'échec."""
         try:
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                with open(filename, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=1024):
-                        f.write(chunk)
-                print(f"Fichier téléchargé : {filename}")
-            else:
-                print(f"Erreur lors du téléchargement de {url}")
+            path = asset_store.fetch(url, revalidate=revalidate)
+            print(f"Fichier téléchargé : {url}")
+            return path
         except Exception as e:
-            print(f"Erreur: {e}")
+            print(f"Erreur lors du téléchargement de {url} : {e}")
+        return None
 
+    @classmethod
+    def download_episode(self, guid, mp3_url, episode_subdir, local_image_path, image_url, overlay_text):
+        """Ajoute l'audio de l'épisode au pack et planifie le rendu de sa vignette. Retourne la liste des erreurs rencontrées."""
+        erreurs = []
+        if not self.csv_only:
+            mp3_path = self.download_file(mp3_url)
+            if mp3_path:
+                self.pack.write_file(f"{episode_subdir}/story.mp3", mp3_path)
+            else:
+                erreurs.append(f"audio {mp3_url}")
+
+        image_path = local_image_path if os.path.isfile(local_image_path) else None
+        if image_path is None and image_url:
+            image_path = self.download_file(image_url, revalidate=True)
+            if image_path is None:
+                erreurs.append(f"image {image_url}")
+        if image_path:
+            self.submit_render(guid, f"{episode_subdir}/title{image_render.PHOTO_EXTENSION}", image_render.render_resized,
+                               image_path, self.screen_size, overlay_text, self.font_path)
+        return erreurs
 
+    @classmethod
+    def submit_download(self, label, guid, *args):
+        """Planifie le téléchargement d'un épisode dans le pool de workers."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.download_jobs.append((label, guid, self.executor.submit(self.download_episode, guid, *args)))
 
     @classmethod
-    def resize_image(self, input_path, output_path, size, text):
-        try:
-            with Image.open(input_path) as img:
-                target_height = size[1]
-                img_ratio = img.width / img.height
-                new_width = int(img_ratio * target_height)
-                img = img.resize((new_width, target_height), Image.Resampling.LANCZOS)
-                background = Image.new("RGB", size, (0, 0, 0))
-                x_offset = (size[0] - new_width) // 2
-                background.paste(img, (x_offset, 0))
-                if text is not None:
-                    draw = ImageDraw.Draw(background)
-                    font = ImageFont.truetype(self.font_path, 36)
-
-                    # Calculer la taille du texte
-                    wrapped_text = textwrap.fill(text, width=30)  # Ajustez la largeur selon vos besoins
-                    bbox = draw.textbbox((0, 0), wrapped_text, font=font)
-                    text_width = bbox[2] - bbox[0]
-                    text_height = bbox[3] - bbox[1]
-                    padding = 10
-                    box_width = 640
-                    box_height = text_height + padding * 2
-
-                    # Créer un cadre semi-transparent
-                    transparency = 200
-                    box = Image.new("RGBA", (box_width, box_height), (255, 255, 255, transparency))
-                    draw_box = ImageDraw.Draw(box)
-                    draw_box.rectangle([0, 0, box_width, box_height], fill=(255, 255, 255, transparency))
-                  
-
-                    # Ajouter le cadre à l'image
-                    box_x = size[0] // 2 - box_width // 2
-                    box_y = size[1] - box_height - 20
-                    background.paste(box, (box_x, box_y), box)
-
-                    # Ajouter le texte centré dans le cadre
-                    text_x = size[0] // 2 - text_width // 2
-                    text_y = box_y
-                    draw.text((text_x, text_y), wrapped_text, fill="black", font=font)
-
-                background.save(output_path)
-        except Exception as e:
-            print(f"Erreur lors du redimensionnement de l'image : {e}")
+    def submit_render(self, guid, arcname, fn, *args):
+        """Planifie le rendu d'une image dans le pool de processus ; elle sera ajoutée au pack à la fin."""
+        self.render_pool.submit((guid, arcname), fn, *args)
+
+    @classmethod
+    def queue_resize(self, ident, arcname, source_path, size):
+        """Met de côté le rendu d'une image partagée : chaque source ne sera décodée qu'une fois."""
+        self.pending_resizes.setdefault(source_path, []).append((ident, arcname, size))
+
+    @classmethod
+    def flush_resizes(self):
+        """Planifie les rendus mis de côté, une tâche par image source pour toutes ses tailles."""
+        for source_path, outputs in self.pending_resizes.items():
+            targets = [(size, None, "height", None) for _, _, size in outputs]
+            # En cas d'échec, tous les éléments qui utilisent cette source sont incomplets
+            idents = tuple(dict.fromkeys(ident for ident, _, _ in outputs))
+            self.submit_render(idents, tuple(arcname for _, arcname, _ in outputs),
+                               image_render.render_resized_many, source_path, targets, self.font_path)
+        self.pending_resizes = {}
+
+    @classmethod
+    def wait_renders(self):
+        """Ajoute au pack les images rendues. Retourne les guid des épisodes (ou dossiers des groupes, "main", "choice") dont le rendu a échoué."""
+        results, errors = self.render_pool.wait()
+        for (_, arcname), image_data in results:
+            if isinstance(arcname, tuple):
+                # Une source rendue en plusieurs tailles
+                for name, data in zip(arcname, image_data):
+                    self.pack.write_bytes(name, data)
+            else:
+                self.pack.write_bytes(arcname, image_data)
+        failed = set()
+        for (guid, _), _ in errors:
+            failed.update(guid if isinstance(guid, tuple) else (guid,))
+        return failed
 
+    @classmethod
+    def wait_downloads(self):
+        """Attend la fin des téléchargements et affiche les échecs épisode par épisode."""
+        echecs = []
+        for label, guid, future in self.download_jobs:
+            try:
+                erreurs = future.result()
+            except Exception as e:
+                erreurs = [str(e)]
+            if erreurs:
+                echecs.append((label, guid, erreurs))
+        self.download_jobs = []
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+        if echecs:
+            print(f"{len(echecs)} épisode(s) en échec :")
+            for label, _, erreurs in echecs:
+                print(f"  - {label} : {', '.join(erreurs)}")
+        return echecs
 
     @classmethod
-    def create_text_image(self, output_path, text, color_index=0):
+    def build_params(self):
+        """Paramètres de construction qui influent sur le contenu des fichiers du pack."""
+        return {
+            "clean_strings": self.clean_strings,
+            "generate_audio": self.generate_audio,
+            "add_episode_title": self.add_episode_title,
+            "csv_only": self.csv_only,
+            "font_path": self.font_path,
+            "screen_size": list(self.screen_size),
+            "cover_size": list(self.cover_size),
+            "render_version": image_render.RENDER_VERSION,
+            "tts_backend": tts_cache.default_backend,
+        }
 
+    @staticmethod
+    def inputs_key(*values):
+        """Empreinte des entrées ayant servi à produire un élément du pack."""
+        return hashlib.sha256(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def file_key(path):
+        return [path, os.path.getsize(path), os.path.getmtime(path)] if os.path.isfile(path) else None
+
+    @classmethod
+    def open_previous_pack(self, zip_path):
+        """Charge le manifeste du pack précédent s'il a été construit avec les mêmes paramètres."""
         try:
-            background_color = self.pastel_colors[color_index % len(self.pastel_colors)]
-            img = Image.new("RGB", self.screen_size, background_color)
-            draw = ImageDraw.Draw(img)
-            font = ImageFont.truetype(self.font_path, size=26)
-
-            margin = 19
-            max_width = 640  # Largeur maximale en pixels pour une ligne de texte
-            available_height = self.screen_size[1] - 2 * margin
-            line_height = 36
-
-            # Fonction pour ajuster le texte en fonction de la largeur maximale
-            def wrap_text(text, max_width, font):
-                wrapped_lines = []
-                words = text.split()
-                line = ""
-                for word in words:
-                    test_line = f"{line} {word}".strip()
-                    bbox = draw.textbbox((0, 0), test_line, font=font)
-                    if bbox[2] > (max_width - 2 * margin):  # Vérifie si la largeur dépasse max_width
-                        wrapped_lines.append(line)
-                        line = word  # Démarre une nouvelle ligne avec le mot actuel
-                    else:
-                        line = test_line
-                if line:  # Ajoute la dernière ligne si elle existe
-                    wrapped_lines.append(line)
-                return wrapped_lines
-
-            # Découpe le texte pour qu'il tienne dans la largeur spécifiée
-            text_lines = []
-            for line in text.split('\n'):
-                text_lines.extend(wrap_text(line, max_width, font))
-
-            # Calcule la hauteur totale et ajuste la taille de la police si nécessaire
-            total_text_height = line_height * len(text_lines)
-            if total_text_height > available_height:
-                font_size = int(font.size * available_height / total_text_height)
-                font = ImageFont.truetype(self.font_path, font_size)
-                line_height = font_size
-                total_text_height = line_height * len(text_lines)
-
-            # Calcule l'espacement vertical entre les lignes
-            spacing = (available_height - total_text_height) / (len(text_lines) + 1)
-            y_offset = margin
-
-            # Dessine le texte sur l'image
-            for line in text_lines:
-                draw.text((margin, y_offset), line, font=font, fill="black")
-                y_offset += line_height + spacing
-
-            # Sauvegarde l'image générée
-            img.save(output_path)
+            zipf = zipfile.ZipFile(zip_path)
+        except (FileNotFoundError, zipfile.BadZipFile):
+            return
+        try:
+            manifest = json.loads(zipf.read(self.manifest_name))
+        except (KeyError, ValueError):
+            manifest = None
+        if not manifest or manifest.get("params") != self.build_params():
+            print("Pas de manifeste compatible dans le pack précédent : reconstruction complète.")
+            zipf.close()
+            return
+        self.previous_pack = zipf
+        self.previous_manifest = manifest
+        # Les groupes se décalent quand un épisode est ajouté : on les retrouve par empreinte
+        self.previous_groups = {entry["key"]: entry for entry in manifest["groups"].values()}
+
+    @classmethod
+    def close_previous_pack(self):
+        if self.previous_pack is not None:
+            self.previous_pack.close()
+        self.previous_pack = None
+        self.previous_manifest = None
+        self.previous_groups = {}
+
+    @classmethod
+    def inputs_fingerprint(self, feed_digest):
+        """Empreinte de tout ce qui alimente le pack : flux, fichier de correspondance des titres, images scrappées."""
+        images_mtime = os.path.getmtime('images') if os.path.isdir('images') else None
+        return self.inputs_key(feed_digest, self.file_key(f"{self.main_dir}.csv"), images_mtime)
+
+    @classmethod
+    def reuse(self, previous, key, new_dir):
+        """
+        Recopie depuis le pack précédent les fichiers d'un élément dont les entrées n'ont pas changé.
+
+        :return: True si l'élément a été repris tel quel
+        """
+        if self.previous_pack is None or not previous or previous["key"] != key:
+            return False
+        prefix = f"{new_dir}/" if new_dir else ""
+        old_prefix = f"{previous['dir']}/" if previous["dir"] else ""
+        for name in previous["files"]:
+            self.pack.copy_from(self.previous_pack, f"{old_prefix}{name}", f"{prefix}{name}")
+        return True
+
+    @classmethod
+    def record(self, section, ident, key, directory):
+        """Note un élément du pack pour le manifeste."""
+        self.manifest_entries.append((section, ident, key, directory))
+
+    @classmethod
+    def write_manifest(self, feed_digest, failed_guids):
+        """Ajoute au pack le manifeste décrivant chaque élément, ses fichiers et leurs empreintes."""
+        manifest = {"version": 1, "params": self.build_params(),
+                    "inputs": self.inputs_fingerprint(feed_digest) if not failed_guids else None,
+                    "root": {}, "groups": {}, "episodes": {}}
+        # Dossiers des épisodes incomplets : leurs fichiers restent dans le pack (la numérotation
+        # des dossiers ne doit pas avoir de trou), mais ni eux ni leur groupe ne sont réutilisables
+        failed_dirs = [f"{directory}/" for section, ident, _, directory in self.manifest_entries
+                       if section == "episodes" and ident in failed_guids]
+        for section, ident, key, directory in self.manifest_entries:
+            if ident in failed_guids:
+                continue  # Épisode (ou vignette de groupe) incomplet : il sera retraité au prochain passage
+            if section == "groups" and any(failed.startswith(f"{directory}/") for failed in failed_dirs):
+                continue  # Groupe contenant un épisode incomplet : il sera régénéré avec lui
+            prefix = f"{directory}/" if directory else ""
+            files = {
+                name[len(prefix):]: digest for name, digest in self.pack.hashes.items()
+                if name.startswith(prefix) and "/" not in name[len(prefix):]
+            }
+            manifest[section][ident] = {"key": key, "dir": directory, "files": files}
+        self.pack.write_text(self.manifest_name, json.dumps(manifest, ensure_ascii=False, indent=1))
+
 
-        except Exception as e:
-            print(f"Erreur lors de la création de l'image : {e}")
 
     @classmethod
-    def generate_audio_file(self, text, output_path):
+    def generate_audio_file(self, text, arcname, ident):
+        """Ajoute au pack l'audio du texte ; en cas d'échec, l'élément ident est noté incomplet."""
         print(f"Génération de l'audio pour : {text}")
         try:
-            tts = gTTS(text=text, lang='fr')
-            tts.save(output_path)
-            print(f"Fichier audio généré : {output_path}")
+            # Une phrase déjà synthétisée (par ce pack ou un autre) est reprise du cache
+            self.pack.write_file(arcname, tts_cache.synthesize(text, lang='fr'))
+            print(f"Fichier audio généré : {arcname}")
         except Exception as e:
             print(f"Erreur lors de la génération de l'audio : {e}")
+            self.failed_idents.add(ident)
 
     @classmethod
-    def create_groups_dir(self, feed, choice_dir):
-        episodes = feed.entries
+    def create_groups_dir(self, episodes, choice_dir):
         if self.reverse_order:
-            episodes = episodes[::-1]
-        total_episodes = len(episodes)
+            # L'ordre inverse oblige à lire tout le flux, mais seuls les Episode (légers) sont gardés
+            episodes = reversed(list(episodes))
 
-        if not self.disable_grouping and total_episodes > 26:
-            groups = [episodes[i:i + 8] for i in range(0, total_episodes, 8)]
-        else:
+        # Il suffit de lire 27 épisodes pour savoir s'il faut grouper
+        head, episodes = feed_reader.peek(episodes, 27)
+        is_single_group = self.disable_grouping or len(head) <= 26
+        if is_single_group:
             groups = [episodes]
+        else:
+            groups = feed_reader.batched(episodes, 8)
 
-        is_single_group = len(groups) == 1
         for group_index, group in enumerate(groups):
             if is_single_group:
                 group_dir = choice_dir
             else:
-                group_dir = os.path.join(choice_dir, str(group_index))
-                os.makedirs(group_dir, exist_ok=True)
+                group_dir = f"{choice_dir}/{group_index}"
             
                 title_text = f"Partie, {self.nombre_en_lettres(group_index + 1)}"
                 if self.clean_strings:
                     title_text = self.clean_string(title_text)
 
-                if not self.csv_only:
-                    if self.generate_audio:
-                        self.generate_audio_file(title_text, os.path.join(group_dir, 'title.mp3'))
-                    else:
-                        with open(os.path.join(group_dir, 'title.txt'), 'w', encoding='utf-8') as f:
-                            f.write(title_text)
-            
                 episode_titles = "\n- ".join([self.traduire(ep.title) for ep in group])
                 episode_titles = f"- {episode_titles}"
 
                 if self.clean_strings:
                     episode_titles = self.clean_string(episode_titles)
 
-                self.create_text_image(os.path.join(group_dir, 'title.png'), episode_titles, color_index=group_index)
+                # Seuls les groupes dont la liste d'épisodes a changé sont régénérés
+                group_key = self.inputs_key("group", title_text, episode_titles, group_index)
+                self.record("groups", group_dir, group_key, group_dir)
+                if not self.reuse(self.previous_groups.get(group_key), group_key, group_dir):
+                    if not self.csv_only:
+                        if self.generate_audio:
+                            self.generate_audio_file(title_text, f"{group_dir}/title.mp3", group_dir)
+                        else:
+                            self.pack.write_text(f"{group_dir}/title.txt", title_text)
+
+                    background_color = self.pastel_colors[group_index % len(self.pastel_colors)]
+                    # En cas d'échec du rendu, le groupe (identifié par son dossier) est exclu du manifeste
+                    self.submit_render(group_dir, f"{group_dir}/title{image_render.CARD_EXTENSION}", image_render.render_text_card,
+                                       episode_titles, background_color, self.screen_size, self.font_path)
             
             for episode_index, entry in enumerate(group):
-                mp3_url = next((link.href for link in entry.links if link.type == 'audio/mpeg'), None)
+                mp3_url = entry.mp3_url
                 if not mp3_url:
                     continue
                 
-                episode_subdir = os.path.join(group_dir, str(episode_index))
-                os.makedirs(episode_subdir, exist_ok=True)
+                episode_subdir = f"{group_dir}/{episode_index}"
                 
                 title_text = self.traduire(entry.title)
                 if self.clean_strings:
                     title_text = self.clean_string(title_text)
                 
+                local_file_name = "".join(x for x in entry.title if x.isalnum() or x in (" ", "_")).rstrip()
+                local_file_path = f'images/{local_file_name}.jpg'
+                episode_image_url = entry.image_url
+
+                # Un épisode déjà présent dans le pack précédent avec les mêmes entrées est recopié tel quel
+                guid = entry.guid or mp3_url
+                episode_key = self.inputs_key("episode", title_text, mp3_url, episode_image_url, self.file_key(local_file_path))
+                self.record("episodes", guid, episode_key, episode_subdir)
+                previous = self.previous_manifest["episodes"].get(guid) if self.previous_manifest else None
+                if self.reuse(previous, episode_key, episode_subdir):
+                    continue
+
                 if not self.csv_only:
                     if self.generate_audio:
-                        self.generate_audio_file(title_text, os.path.join(episode_subdir, 'title.mp3'))
+                        self.generate_audio_file(title_text, f"{episode_subdir}/title.mp3", guid)
                     else:
-                        with open(os.path.join(episode_subdir, 'title.txt'), 'w', encoding='utf-8') as f:
-                            f.write(title_text)
-                
-                mp3_path = os.path.join(episode_subdir, 'story.mp3')
-                if not self.csv_only:
-                    self.download_file(mp3_url, mp3_path)
+                        self.pack.write_text(f"{episode_subdir}/title.txt", title_text)
 
-                local_file_name = "".join(x for x in entry.title if x.isalnum() or x in (" ", "_")).rstrip()
-                local_file_path = f'images/{local_file_name}.jpg'
-
-                if os.path.isfile(local_file_path):
-                    target_path = os.path.join(episode_subdir, 'title.png')
-                    shutil.copy(local_file_path, target_path)
-                    self.resize_image(target_path, target_path, self.screen_size, title_text if self.add_episode_title else None)
-                else:
-                    episode_image_url = entry.get('image', {}).get('href')
-                    if episode_image_url:
-                        episode_image_path = os.path.join(episode_subdir, 'title.png')
-                        self.download_file(episode_image_url, episode_image_path)
-                        self.resize_image(episode_image_path, episode_image_path, self.screen_size, title_text if self.add_episode_title else None)
+                # Les téléchargements partent dans le pool, l'arborescence reste construite dans l'ordre
+                self.submit_download(entry.title, guid, mp3_url, episode_subdir, local_file_path, episode_image_url,
+                                     title_text if self.add_episode_title else None)
 
     @classmethod
-    def create_choice_dir(self, feed, title_image_path):
-        choice_dir = os.path.join(self.main_dir, '0')
-        os.makedirs(choice_dir, exist_ok=True)
+    def create_choice_dir(self, episodes, podcast_image_url):
+        choice_dir = '0'
         title_text = "Quelle épisode veux-tu écouter ?"
 
-        if not self.csv_only:
+        choice_key = self.inputs_key("choice", title_text, podcast_image_url)
+        self.record("root", "choice", choice_key, choice_dir)
+        previous = self.previous_manifest["root"].get("choice") if self.previous_manifest else None
+        if not self.reuse(previous, choice_key, choice_dir) and not self.csv_only:
             if self.generate_audio:
-                self.generate_audio_file(title_text, os.path.join(choice_dir, 'choice.mp3'))
+                self.generate_audio_file(title_text, f"{choice_dir}/choice.mp3", "choice")
             else:
-                with open(os.path.join(choice_dir, 'title.txt'), 'w', encoding='utf-8') as f:
-                    f.write(title_text)
+                self.pack.write_text(f"{choice_dir}/title.txt", title_text)
         
-            shutil.copy(title_image_path, os.path.join(choice_dir, 'title.png'))
+            podcast_image_path = self.download_file(podcast_image_url, revalidate=True) if podcast_image_url else None
+            if podcast_image_path:
+                self.queue_resize("choice", f"{choice_dir}/title{image_render.PHOTO_EXTENSION}", podcast_image_path, self.screen_size)
+            elif podcast_image_url:
+                self.failed_idents.add("choice")
         
-        self.create_groups_dir(feed, choice_dir)
+        self.create_groups_dir(episodes, choice_dir)
 
     @classmethod
     def download_podcast(self):
 
-        feed = feedparser.parse(self.rss_url)
-        podcast_title = feed.feed.title
-        podcast_image_url = feed.feed.image.href if 'image' in feed.feed else None
+        feed_path, feed_changed = http_cache.fetch(self.rss_url)
+        if not feed_changed:
+            print("Flux RSS inchangé depuis la dernière exécution, copie locale utilisée.")
+        feed_digest = asset_store.hash_file(feed_path)
+        channel, episodes = feed_reader.open_feed(feed_path)
+        podcast_title = channel.title
+        podcast_image_url = channel.image_url
         self.main_dir = self.clean_filename(podcast_title)
-        
-        if os.path.exists(self.main_dir):
-            shutil.rmtree(self.main_dir)
-        
-        os.makedirs(self.main_dir)
+        zip_path = f"{self.main_dir}.zip"
+
+        self.open_previous_pack(zip_path)
+        if self.previous_pack is not None and self.previous_manifest.get("inputs") == self.inputs_fingerprint(feed_digest):
+            # Rien n'a changé : le pack existant est déjà à jour
+            self.close_previous_pack()
+            print(f"Pack déjà à jour : {zip_path}")
+            return
 
         main_title_text = podcast_title
         if self.clean_strings:
             main_title_text = self.clean_string(main_title_text)
 
+        self.render_pool = image_render.RenderPool(self.font_path, self.render_workers)
+        self.failed_idents = set()
+
+        # Le pack est écrit directement dans le zip, sans dossier temporaire
+        with PackWriter(zip_path) as self.pack:
+            root_key = self.inputs_key("root", main_title_text, podcast_image_url)
+            self.record("root", "main", root_key, "")
+            previous = self.previous_manifest["root"].get("main") if self.previous_manifest else None
+            if not self.reuse(previous, root_key, "") and not self.csv_only:
+                if self.generate_audio:
+                    self.generate_audio_file(main_title_text, 'main-title.mp3', "main")
+                else:
+                    self.pack.write_text('main-title.txt', main_title_text)
 
-        main_image_path = os.path.join(self.main_dir, 'main-title.png')
-        cover_image_path = os.path.join(self.main_dir, 'cover.png')
-        
-        if not self.csv_only:
-            if self.generate_audio:
-                self.generate_audio_file(main_title_text, os.path.join(self.main_dir, 'main-title.mp3'))
-            else:
-                main_title_path = os.path.join(self.main_dir, 'main-title.txt')
-                with open(main_title_path, 'w', encoding='utf-8') as f:
-                    f.write(main_title_text)
-
-            if podcast_image_url:
-                self.download_file(podcast_image_url, main_image_path)
-                self.resize_image(main_image_path, main_image_path, self.screen_size, None)
-                self.resize_image(main_image_path, cover_image_path, self.cover_size, None)
-        
-        self.create_choice_dir(feed, main_image_path)
-
-        self.zip_folder()
+                podcast_image_path = self.download_file(podcast_image_url, revalidate=True) if podcast_image_url else None
+                if podcast_image_path:
+                    self.queue_resize("main", f"main-title{image_render.PHOTO_EXTENSION}", podcast_image_path, self.screen_size)
+                    self.queue_resize("main", f"cover{image_render.PHOTO_EXTENSION}", podcast_image_path, self.cover_size)
+                elif podcast_image_url:
+                    self.failed_idents.add("main")
 
-        try:
-            shutil.rmtree(self.main_dir)
-            print(f"Dossier supprimé après zippage : {self.main_dir}")
-        except Exception as e:
-            print(f"Erreur lors de la suppression du dossier : {e}")
+            try:
+                self.create_choice_dir(episodes, podcast_image_url)
+            finally:
+                # Le fichier de correspondance fait partie des entrées du manifeste : il est écrit avant lui
+                self.enregistrer_mapping()
+                self.flush_resizes()
+                echecs = self.wait_downloads()
+                # Les images sont rendues en parallèle et ajoutées au pack avant sa finalisation
+                failed_guids = self.wait_renders() | {guid for _, guid, _ in echecs} | self.failed_idents
+                self.render_pool.shutdown()
+            self.write_manifest(feed_digest, failed_guids)
+            # Le pack précédent doit être fermé avant d'être remplacé par le nouveau
+            self.close_previous_pack()
+
+        if self.generate_audio:
+            print(tts_cache.summary())
+        print(f"Pack créé avec succès : {zip_path}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -423,4 +529,8 @@ if __name__ == "__main__":
     PodcastDownloader.disable_grouping = 'disable_grouping' in sys.argv
     PodcastDownloader.add_episode_title = 'add_episode_title' in sys.argv
     PodcastDownloader.csv_only = 'csv_only' in sys.argv
+    PodcastDownloader.max_workers = next((int(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('workers=')), 8)
+    PodcastDownloader.render_workers = next((int(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('render_workers=')), None)
+    http_client.configure(pool_maxsize=PodcastDownloader.max_workers)
+    tts_cache.configure(backend=next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('tts=')), None))
     PodcastDownloader.download_podcast()
@@ -0,0 +1,98 @@
+"""Écriture d'un pack Telmi directement dans son fichier zip.
+
+Les fichiers du pack (audios, vignettes, titres) sont ajoutés à l'archive au
+fur et à mesure de leur production, sans passer par une arborescence
+temporaire sur le disque. L'archive est écrite dans <pack>.zip.part puis
+renommée une fois complète.
+
+La méthode de compression est choisie fichier par fichier : les mp3 et les
+images sont déjà compressés et sont simplement stockés, seuls les fichiers
+texte sont compressés (deflate). L'archive reste un zip standard.
+"""
+import hashlib
+import os
+import threading
+import zipfile
+
+# Formats déjà compressés : les recompresser coûte du CPU sans rien gagner
+STORED_EXTENSIONS = {".mp3", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".ogg", ".m4a"}
+
+
+def compression_for(arcname):
+    """Méthode de compression zip adaptée au type de fichier."""
+    if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+class PackWriter:
+    """Archive zip d'un pack, utilisable depuis plusieurs threads."""
+
+    def __init__(self, zip_path, compression=None):
+        """
+        :param zip_path: Chemin du zip final
+        :param compression: Force une méthode pour tous les fichiers (par défaut : choix selon l'extension)
+        """
+        self.zip_path = zip_path
+        self.part_path = f"{zip_path}.part"
+        self.compression = compression
+        self._zipf = zipfile.ZipFile(self.part_path, "w", zipfile.ZIP_DEFLATED)
+        self._lock = threading.Lock()
+        # Empreinte sha256 de chaque fichier écrit, pour le manifeste du pack
+        self.hashes = {}
+
+    def _compression_for(self, arcname):
+        return self.compression if self.compression is not None else compression_for(arcname)
+
+    def write_bytes(self, arcname, data):
+        """Ajoute un fichier au pack à partir de son contenu en mémoire."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._zipf.writestr(arcname, data, compress_type=self._compression_for(arcname))
+            self.hashes[arcname] = digest
+
+    def write_text(self, arcname, text):
+        self.write_bytes(arcname, text.encode("utf-8"))
+
+    def write_file(self, arcname, path):
+        """Ajoute un fichier local au pack en le lisant par blocs (pas de copie intermédiaire)."""
+        zinfo = zipfile.ZipInfo.from_file(path, arcname)
+        zinfo.compress_type = self._compression_for(arcname)
+        with open(path, "rb") as src, self._lock:
+            self.hashes[arcname] = self._copy(src, zinfo)
+
+    def copy_from(self, source_zip, source_arcname, arcname):
+        """Recopie un fichier d'un autre zip (ex: la version précédente du pack)."""
+        source_info = source_zip.getinfo(source_arcname)
+        zinfo = zipfile.ZipInfo(arcname, date_time=source_info.date_time)
+        zinfo.file_size = source_info.file_size
+        zinfo.compress_type = self._compression_for(arcname)
+        with source_zip.open(source_info) as src, self._lock:
+            self.hashes[arcname] = self._copy(src, zinfo)
+
+    def _copy(self, src, zinfo):
+        sha = hashlib.sha256()
+        with self._zipf.open(zinfo, "w") as dest:
+            for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                sha.update(chunk)
+                dest.write(chunk)
+        return sha.hexdigest()
+
+    def close(self):
+        """Termine l'archive et la met à sa place définitive."""
+        self._zipf.close()
+        os.replace(self.part_path, self.zip_path)
+
+    def abort(self):
+        """Abandonne l'archive en cours sans toucher à un éventuel pack précédent."""
+        self._zipf.close()
+        os.remove(self.part_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
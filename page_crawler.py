@@ -0,0 +1,51 @@
+"""Parcours d'une liste paginée (?p=1, ?p=2...) avec plusieurs pages demandées à la fois.
+
+Les pages sont téléchargées dans une fenêtre glissante : jusqu'à `window`
+requêtes sont en cours, et dès qu'une page est rendue à l'appelant la
+suivante est demandée. Les pages sont toujours rendues dans l'ordre, ce qui
+permet à l'appelant de garder ses conditions d'arrêt (page sans épisode,
+titre déjà vu) ; les requêtes encore en cours à l'arrêt sont abandonnées.
+Quelques pages au-delà de la dernière peuvent donc être téléchargées pour
+rien, au plus window - 1.
+"""
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+
+DEFAULT_WINDOW = 4
+
+
+def fetch_page(url, parse):
+    return parse(http_client.get(url).content)
+
+
+def crawl(base_url, parse, window=DEFAULT_WINDOW, first_page=1):
+    """
+    Parcourt les pages base_url + numéro, en en téléchargeant window à la fois.
+
+    :param parse: Fonction appliquée au contenu de chaque page, dans le thread qui l'a téléchargée
+    :return: Générateur de (numéro de page, résultat de parse), dans l'ordre des pages et sans fin :
+             c'est à l'appelant de s'arrêter
+    """
+    executor = ThreadPoolExecutor(max_workers=window)
+    page_numbers = itertools.count(first_page)
+    pending = deque()
+
+    def request_next():
+        page_number = next(page_numbers)
+        pending.append((page_number, executor.submit(fetch_page, f"{base_url}{page_number}", parse)))
+
+    try:
+        for _ in range(window):
+            request_next()
+        while True:
+            page_number, future = pending.popleft()
+            result = future.result()
+            request_next()
+            yield page_number, result
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
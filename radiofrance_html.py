@@ -0,0 +1,80 @@
+"""Extraction des épisodes d'une page de liste Radio France.
+
+Les scrappers n'ont besoin que de la liste ul.Collection-section-items :
+pour chaque épisode, le texte du lien span.CardTitle a et l'URL de la
+première source de picture. Plutôt que de construire l'arbre de toute la
+page (en-tête, menus, scripts...), la liste est repérée directement dans le
+HTML brut et seul ce fragment est analysé, avec lxml s'il est installé, sinon
+avec html.parser. Si le repérage échoue (balisage inattendu), la page entière
+est analysée, en ne gardant que les balises ul (SoupStrainer).
+"""
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401  (analyseur optionnel, bien plus rapide que html.parser)
+
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+LIST_CLASS = "Collection-section-items"
+ITEM_CLASS = "Collection-section-items-item"
+
+# Balise ouvrante d'un ul dont l'attribut class contient exactement LIST_CLASS (et pas ...-item)
+_LIST_START = re.compile(
+    rb"""<ul\b[^>]*?\bclass\s*=\s*(["'])(?:(?!\1).)*?(?<![\w-])""" + LIST_CLASS.encode() + rb"""(?![\w-])""",
+    re.IGNORECASE | re.DOTALL,
+)
+_UL_TAG = re.compile(rb"<(/?)ul\b", re.IGNORECASE)
+
+
+def _list_fragment(content):
+    """HTML de la liste des épisodes (du <ul> à son </ul>), ou None si elle n'est pas repérée."""
+    start = _LIST_START.search(content)
+    if not start:
+        return None
+    depth = 0
+    for tag in _UL_TAG.finditer(content, start.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return content[start.start():content.find(b">", tag.end()) + 1]
+    return None
+
+
+def _episodes_from_list(episodes):
+    resultats = []
+    for item in episodes.find_all("li", class_=ITEM_CLASS):
+        picture = item.find("picture")
+        source = picture.find("source") if picture else None
+        img_src = source.get("srcset") if source else None
+
+        title_span = item.find("span", class_="CardTitle")
+        link = title_span.find("a") if title_span else None
+        title = link.text.strip() if link else None
+
+        if img_src and title:
+            resultats.append((title, img_src))
+    return resultats
+
+
+def extract_episodes(content):
+    """
+    Épisodes d'une page de la liste.
+
+    :param content: Contenu de la page (bytes, tel que reçu)
+    :return: Liste de (titre, URL de l'image), ou None si la page n'a pas de liste d'épisodes
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    fragment = _list_fragment(content)
+    if fragment is not None:
+        soup = BeautifulSoup(fragment, PARSER, from_encoding="utf-8")
+    else:
+        soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("ul"))
+
+    episodes = soup.find("ul", class_=LIST_CLASS)
+    if not episodes:
+        return None
+    return _episodes_from_list(episodes)
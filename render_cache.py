@@ -0,0 +1,161 @@
+"""Cache persistant des images rendues (vignettes, titres, cartes de groupe).
+
+La clé d'un rendu est calculée à partir de la fonction de rendu et de ses
+paramètres, les fichiers (image source, police) étant représentés par
+l'empreinte de leur contenu : une même image source, avec le même texte, la
+même taille et la même police, n'est rendue qu'une seule fois, toutes
+exécutions et tous packs confondus.
+
+La taille totale est plafonnée (TELMI_RENDER_CACHE_MAX_BYTES, 1 Go par
+défaut) : au-delà, les rendus les moins récemment utilisés sont supprimés.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+from asset_store import hash_file
+from http_cache import CACHE_DIR
+
+RENDER_DIR = os.path.join(CACHE_DIR, "renders")
+MAX_BYTES = int(os.environ.get("TELMI_RENDER_CACHE_MAX_BYTES", 1024 ** 3))
+
+_lock = threading.Lock()
+_index = None
+_dirty = False
+
+
+def _index_path():
+    return os.path.join(RENDER_DIR, "index.json")
+
+
+def _load_index():
+    global _index
+    if _index is None:
+        os.makedirs(RENDER_DIR, exist_ok=True)
+        try:
+            with open(_index_path(), encoding="utf-8") as f:
+                _index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            _index = {}
+    return _index
+
+
+def _save_index():
+    global _dirty
+    if _index is None:
+        return
+    tmp_path = f"{_index_path()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_index, f)
+    os.replace(tmp_path, _index_path())
+    _dirty = False
+
+
+@atexit.register
+def flush():
+    """Écrit l'index sur disque s'il a été modifié."""
+    with _lock:
+        if _dirty:
+            _save_index()
+
+
+def _entry_path(key, part):
+    return os.path.join(RENDER_DIR, key[:2], f"{key}-{part}")
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path, mtime_ns, size):
+    return hash_file(path)
+
+
+def _file_part(path):
+    if isinstance(path, str) and os.path.isfile(path):
+        # Un fichier est identifié par son contenu, pas par son chemin
+        stat = os.stat(path)
+        return ["file", _file_digest(path, stat.st_mtime_ns, stat.st_size)]
+    return path
+
+
+def render_key(name, arguments, path_parameters):
+    """
+    Clé d'un rendu : nom de la fonction et paramètres.
+
+    :param arguments: Paramètres du rendu, par nom
+    :param path_parameters: Noms des paramètres qui désignent des fichiers, remplacés par leur empreinte ;
+                            les autres (textes compris) sont pris tels quels
+    """
+    parts = {
+        parameter: _file_part(value) if parameter in path_parameters else value
+        for parameter, value in sorted(arguments.items())
+    }
+    payload = json.dumps([name, parts], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key):
+    """
+    Retourne le rendu mémorisé sous key, ou None s'il est absent.
+
+    :return: Le contenu de l'image (bytes), ou une liste de contenus pour un rendu multiple
+    """
+    global _dirty
+    with _lock:
+        entry = _load_index().get(key)
+        if entry is None:
+            return None
+        try:
+            parts = []
+            for part in range(entry["parts"] or 1):
+                with open(_entry_path(key, part), "rb") as f:
+                    parts.append(f.read())
+        except FileNotFoundError:
+            del _index[key]
+            _dirty = True
+            return None
+        entry["last_used"] = time.time()
+        _dirty = True
+    return parts if entry["parts"] is not None else parts[0]
+
+
+def _remove(key):
+    entry = _index.pop(key)
+    for part in range(entry["parts"] or 1):
+        try:
+            os.remove(_entry_path(key, part))
+        except FileNotFoundError:
+            pass
+
+
+def _evict():
+    """Supprime les rendus les moins récemment utilisés tant que le plafond est dépassé."""
+    total = sum(entry["size"] for entry in _index.values())
+    for key in sorted(_index, key=lambda k: _index[k]["last_used"]):
+        if total <= MAX_BYTES:
+            break
+        total -= _index[key]["size"]
+        _remove(key)
+
+
+def put(key, result):
+    """Mémorise un rendu (bytes, ou liste de bytes pour un rendu multiple)."""
+    global _dirty
+    parts = result if isinstance(result, list) else [result]
+    with _lock:
+        index = _load_index()
+        os.makedirs(os.path.dirname(_entry_path(key, 0)), exist_ok=True)
+        for part, data in enumerate(parts):
+            tmp_path = f"{_entry_path(key, part)}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, _entry_path(key, part))
+        index[key] = {
+            "parts": len(parts) if isinstance(result, list) else None,
+            "size": sum(len(data) for data in parts),
+            "last_used": time.time(),
+        }
+        _dirty = True
+        _evict()
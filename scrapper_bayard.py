@@ -1,7 +1,6 @@
 import os
-import requests
+import asset_store
 from PIL import Image, ImageOps
-from io import BytesIO
 
 # Créez le dossier si nécessaire
 output_folder = "mpjl"
@@ -20,12 +19,11 @@ for index in range(1, 261):  # 1 à 260 inclus
         url = base_url.format(index=str(index).zfill(3))  # Ajoute les zéros à gauche pour avoir trois chiffres
         print(f"Téléchargement de l'image {index} : {url}")
 
-        # Télécharger l'image
-        response = requests.get(url)
-        response.raise_for_status()  # Vérifie si la requête a réussi
+        # Télécharger l'image (ou la reprendre du magasin local)
+        image_path = asset_store.fetch(url)
 
         # Charger l'image
-        original_image = Image.open(BytesIO(response.content))
+        original_image = Image.open(image_path)
 
         # Créer une nouvelle image de fond
         background = Image.new("RGB", (640, 480), background_color)
@@ -1,10 +1,13 @@
-import requests
-from bs4 import BeautifulSoup
+import asset_store
+import page_crawler
+import radiofrance_html
+from title_mapping import MappingFile
 from PIL import Image
-from io import BytesIO
 import os
 import csv
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Dossiers pour les images et les fichiers audio
 os.makedirs('images', exist_ok=True)
@@ -12,6 +15,11 @@ os.makedirs('audio', exist_ok=True)
 
 # Nom du fichier de mapping
 MAPPING_FILE = 'mapping.csv'
+# Nombre de nouvelles lignes gardées en mémoire avant d'écrire le fichier de mapping
+MAPPING_FLUSH_EVERY = 50
+# Images d'épisodes téléchargées et recadrées en même temps
+DEFAULT_IMAGE_WORKERS = 8
+mapping = None
 
 def initialize_mapping_file():
     """Crée le fichier de mapping s'il n'existe pas, avec encodage UTF-8 BOM pour compatibilité avec Excel."""
@@ -20,16 +28,13 @@ def initialize_mapping_file():
             writer = csv.writer(file, delimiter=';')
             writer.writerow(['Nom modifié', 'Nom original'])  # Créer l'en-tête avec les colonnes 'Nom modifié' et 'Nom original'
 
-def add_to_mapping_file(safe_title, original_title):
-    """Ajoute une ligne au fichier de mapping si le fichier n'existe pas déjà."""
-    with open(MAPPING_FILE, mode='r', newline='', encoding='utf-8-sig') as file:
-        reader = csv.DictReader(file, delimiter=';')
-        existing_files = {row['Nom modifié'] for row in reader}
+    # Le mapping est chargé une seule fois ; les nouvelles lignes sont écrites par lots
+    global mapping
+    mapping = MappingFile(MAPPING_FILE, flush_every=MAPPING_FLUSH_EVERY)
 
-    if safe_title not in existing_files:
-        with open(MAPPING_FILE, mode='a', newline='', encoding='utf-8-sig') as file:
-            writer = csv.writer(file, delimiter=';')
-            writer.writerow([safe_title, original_title])  # Ajouter la ligne avec le nom modifié et le nom original
+def add_to_mapping_file(safe_title, original_title):
+    """Ajoute une ligne au fichier de mapping si le nom modifié n'y est pas déjà."""
+    mapping.add(safe_title, original_title)
 
 def file_exists(title, file_type):
     """Vérifie si un fichier (image ou audio) existe déjà."""
@@ -38,90 +43,105 @@ def file_exists(title, file_type):
     file_path = f'{file_type}/{safe_title}.{file_extension}'
     return os.path.isfile(file_path)
 
-def download_episodes(base_url):
-    """Étape 1 : Téléchargement des images et des audios des épisodes."""
-    page_number = 1
-    total_file_count = 0
+def save_episode_image(img_src, safe_title):
+    """Télécharge, recadre et enregistre la vignette d'un épisode ; retourne True si elle a été créée."""
+    img_filename = f'images/{safe_title}.jpg'
+    try:
+        img = Image.open(asset_store.fetch(img_src))
+
+        # Convertir l'image en RGB si elle est en mode RGBA
+        if img.mode == 'RGBA':
+            img = img.convert('RGB')
+
+        # Redimensionner l'image tout en maintenant le ratio
+        frame_width, frame_height = 640, 480
+        aspect_ratio = img.width / img.height
+
+        if aspect_ratio > (frame_width / frame_height):
+            # L'image est plus large que le cadre : ajuster à la largeur
+            new_width = frame_width
+            new_height = int(new_width / aspect_ratio)
+        else:
+            # L'image est plus haute ou carrée : ajuster à la hauteur
+            new_height = frame_height
+            new_width = int(new_height * aspect_ratio)
+
+        img = img.resize((new_width, new_height), Image.LANCZOS)
+
+        # Créer une image de fond noir
+        canvas = Image.new("RGB", (frame_width, frame_height), (0, 0, 0))
+
+        # Centrer l'image redimensionnée sur le fond
+        x_offset = (frame_width - new_width) // 2
+        y_offset = (frame_height - new_height) // 2
+        canvas.paste(img, (x_offset, y_offset))
+
+        # Sauvegarder l'image finale
+        canvas.save(img_filename, "JPEG", quality=100)
+    except Exception as e:
+        print(f"Erreur lors du téléchargement de l'image {img_src} : {e}")
+        return False
+
+    print(f"Téléchargé : {img_filename}")
+    return True
+
+def download_episodes(base_url, window=page_crawler.DEFAULT_WINDOW, image_workers=DEFAULT_IMAGE_WORKERS):
+    """
+    Étape 1 : Téléchargement des images et des audios des épisodes.
+
+    Plusieurs pages de la liste sont demandées à la fois (window), et les images
+    sont téléchargées par un pool séparé pendant que les pages suivantes arrivent.
+    """
     encountered_titles = set()  # Ensemble pour suivre les titres rencontrés
+    image_jobs = deque()
+    total_file_count = 0
 
-    while True:
-        # Construire l'URL de la page en cours
-        url = f"{base_url}{page_number}"
-        print(f"Traitement de la page {page_number}...")
-
-        # Effectuer une requête GET pour récupérer le contenu de la page
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Trouver la liste des épisodes
-        episodes = soup.find('ul', class_='Collection-section-items')
-
-        # Si aucune épisode n'est trouvé, sortir de la boucle
-        if not episodes:
-            break
-
-        # Parcourir chaque épisode
-        for item in episodes.find_all('li', class_='Collection-section-items-item'):
-            picture = item.find('picture')
-            img_src = picture.find('source')['srcset'] if picture else None
-            
-            title_span = item.find('span', class_='CardTitle')
-            title = title_span.find('a').text.strip() if title_span and title_span.find('a') else None
-            
-            if img_src and title:
-                # Si le titre a déjà été rencontré, arrêter complètement le traitement
-                if title in encountered_titles:
-                    print(f"Le titre '{title}' a déjà été rencontré. Arrêt complet.")
-                    return  # Arrêter la boucle principale
-                
-                encountered_titles.add(title)  # Ajouter le titre à l'ensemble
-
-                # Créer une version sécurisée du titre pour le nom de fichier
-                safe_title = "".join(x for x in title if x.isalnum() or x in (" ", "_")).rstrip()
-
-                # Vérifier et télécharger l'image
-                img_filename = f'images/{safe_title}.jpg'
-                if not file_exists(title, 'image'):
-                    img_response = requests.get(img_src)
-                    img = Image.open(BytesIO(img_response.content))
-
-                    # Convertir l'image en RGB si elle est en mode RGBA
-                    if img.mode == 'RGBA':
-                        img = img.convert('RGB')
-
-                    # Redimensionner l'image tout en maintenant le ratio
-                    frame_width, frame_height = 640, 480
-                    aspect_ratio = img.width / img.height
-
-                    if aspect_ratio > (frame_width / frame_height):
-                        # L'image est plus large que le cadre : ajuster à la largeur
-                        new_width = frame_width
-                        new_height = int(new_width / aspect_ratio)
-                    else:
-                        # L'image est plus haute ou carrée : ajuster à la hauteur
-                        new_height = frame_height
-                        new_width = int(new_height * aspect_ratio)
-
-                    img = img.resize((new_width, new_height), Image.LANCZOS)
-
-                    # Créer une image de fond noir
-                    canvas = Image.new("RGB", (frame_width, frame_height), (0, 0, 0))
-
-                    # Centrer l'image redimensionnée sur le fond
-                    x_offset = (frame_width - new_width) // 2
-                    y_offset = (frame_height - new_height) // 2
-                    canvas.paste(img, (x_offset, y_offset))
-
-                    # Sauvegarder l'image finale
-                    canvas.save(img_filename, "JPEG", quality=100)
+    def record_finished(wait=False):
+        """Ajoute au mapping les images terminées, dans l'ordre de la liste quel que soit l'ordre de fin."""
+        nonlocal total_file_count
+        while image_jobs and (wait or image_jobs[0][2].done()):
+            safe_title, title, job = image_jobs.popleft()
+            if job.result():
+                total_file_count += 1
+                # Ajouter au fichier de mapping avec le nom sécurisé et le titre original
+                add_to_mapping_file(safe_title, title)
+
+    try:
+        with ThreadPoolExecutor(max_workers=image_workers) as image_pool:
+            for page_number, episodes in page_crawler.crawl(base_url, radiofrance_html.extract_episodes, window):
+                print(f"Traitement de la page {page_number}...")
+
+                # Si aucune épisode n'est trouvé, sortir de la boucle
+                if episodes is None:
+                    break
+
+                # Parcourir chaque épisode
+                termine = False
+                for title, img_src in episodes:
+                    # Si le titre a déjà été rencontré, arrêter complètement le traitement
+                    if title in encountered_titles:
+                        print(f"Le titre '{title}' a déjà été rencontré. Arrêt complet.")
+                        termine = True
+                        break
                     
-                    print(f"Téléchargé : {img_filename}")
-                    total_file_count += 1
+                    encountered_titles.add(title)  # Ajouter le titre à l'ensemble
+
+                    # Créer une version sécurisée du titre pour le nom de fichier
+                    safe_title = "".join(x for x in title if x.isalnum() or x in (" ", "_")).rstrip()
+
+                    # Vérifier et télécharger l'image
+                    if not file_exists(title, 'image'):
+                        image_jobs.append((safe_title, title, image_pool.submit(save_episode_image, img_src, safe_title)))
 
-                    # Ajouter au fichier de mapping avec le nom sécurisé et le titre original
-                    add_to_mapping_file(safe_title, title)
+                # Les images déjà terminées sont enregistrées sans attendre la fin du parcours
+                record_finished()
 
-        page_number += 1
+                if termine:
+                    break
+    finally:
+        # Le pool a attendu les téléchargements en cours : même un parcours interrompu
+        # (erreur réseau, Ctrl-C) enregistre les images déjà présentes dans images/
+        record_finished(wait=True)
 
     print(f"Total de fichiers traités : {total_file_count}")
 
@@ -129,13 +149,19 @@ def main():
     """Point d'entrée principal."""
     parser = argparse.ArgumentParser(description="Scrape un site pour télécharger des podcasts.")
     parser.add_argument("base_url", type=str, help="URL de base pour scraper les épisodes (exemple : 'https://www.radiofrance.fr/franceinter/podcasts/les-odyssees?p=')")
+    parser.add_argument("--pages", type=int, default=page_crawler.DEFAULT_WINDOW, help="Nombre de pages de la liste demandées en même temps")
+    parser.add_argument("--image-workers", type=int, default=DEFAULT_IMAGE_WORKERS, help="Nombre d'images téléchargées en même temps")
     args = parser.parse_args()
 
     print("Début du script.")
     # Initialiser le fichier de mapping
     initialize_mapping_file()
     # Télécharger les épisodes
-    download_episodes(args.base_url+"?p=")
+    try:
+        download_episodes(args.base_url+"?p=", args.pages, args.image_workers)
+    finally:
+        # Écrire les dernières lignes du mapping, même si le parcours a été interrompu
+        mapping.flush()
     print("Script terminé.")
 
 if __name__ == "__main__":
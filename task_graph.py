@@ -0,0 +1,121 @@
+"""Exécution d'un graphe de tâches dépendantes, réparties entre plusieurs pools.
+
+Chaque tâche est rattachée à une ressource ("cpu", "net", "disk"...) qui a
+son propre pool : une tâche part dès que ses dépendances sont terminées, sans
+attendre les tâches des autres ressources. La durée totale est ainsi bornée
+par la ressource la plus chargée, et non par la somme de toutes.
+
+Une tâche passée en argument d'une autre est remplacée par son résultat et
+compte comme dépendance ; after= ajoute des dépendances sans résultat (ex :
+le dossier doit exister avant d'y écrire). Une tâche dont une dépendance a
+échoué n'est pas lancée.
+"""
+import queue
+
+
+class Task:
+    """Tâche du graphe ; result ou error est renseigné une fois terminée."""
+
+    def __init__(self, name, resource, fn, args, kwargs, after):
+        self.name = name
+        self.resource = resource
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.dependencies = {arg for arg in list(args) + list(kwargs.values()) if isinstance(arg, Task)}
+        self.dependencies.update(after)
+        self.dependents = []
+        self.result = None
+        self.error = None
+        self.skipped = False
+
+    def __repr__(self):
+        return f"Task({self.name!r})"
+
+
+def _resolve(value):
+    return value.result if isinstance(value, Task) else value
+
+
+class TaskGraph:
+    """Graphe de tâches, construit en entier puis exécuté par run()."""
+
+    def __init__(self, submitters):
+        """
+        :param submitters: Ressource -> fonction submit(fn, *args, **kwargs) qui retourne un Future
+                           (ThreadPoolExecutor.submit, ProcessPoolExecutor.submit...)
+        """
+        self.submitters = submitters
+        self.tasks = []
+
+    def add(self, name, resource, fn, *args, after=(), **kwargs):
+        """Ajoute une tâche ; ses dépendances doivent déjà faire partie du graphe."""
+        if resource not in self.submitters:
+            raise ValueError(f"Ressource inconnue : {resource} (disponibles : {', '.join(self.submitters)})")
+        task = Task(name, resource, fn, args, kwargs, after)
+        for dependency in task.dependencies:
+            dependency.dependents.append(task)
+        self.tasks.append(task)
+        return task
+
+    def run(self):
+        """
+        Exécute toutes les tâches en respectant leurs dépendances.
+
+        :return: Liste des tâches en échec et liste des tâches non lancées à cause d'elles
+        """
+        finished = queue.SimpleQueue()
+        waiting = {task: len(task.dependencies) for task in self.tasks}
+        remaining = len(self.tasks)
+        failed = []
+        skipped = []
+
+        def start(task):
+            try:
+                future = self.submitters[task.resource](
+                    task.fn,
+                    *[_resolve(arg) for arg in task.args],
+                    **{name: _resolve(value) for name, value in task.kwargs.items()},
+                )
+            except Exception as e:
+                finished.put((task, None, e))
+                return
+            future.add_done_callback(lambda f: finished.put((task, f, None)))
+
+        def skip(task):
+            # Abandon de la tâche et, de proche en proche, de tout ce qui en dépend
+            nonlocal remaining
+            pending = [task]
+            while pending:
+                current = pending.pop()
+                if current.skipped:
+                    continue
+                current.skipped = True
+                skipped.append(current)
+                remaining -= 1
+                pending.extend(current.dependents)
+
+        for task in self.tasks:
+            if not task.dependencies:
+                start(task)
+
+        while remaining:
+            task, future, error = finished.get()
+            remaining -= 1
+            if error is None:
+                try:
+                    task.result = future.result()
+                except Exception as e:
+                    error = e
+            if error is not None:
+                task.error = error
+                failed.append(task)
+                for dependent in task.dependents:
+                    skip(dependent)
+                continue
+            for dependent in task.dependents:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0 and not dependent.skipped:
+                    start(dependent)
+
+        return failed, skipped
@@ -0,0 +1,98 @@
+"""Cache des polices et des largeurs de mots pour la mise en page des vignettes.
+
+Les polices sont chargées une seule fois par couple (fichier, taille), et la
+largeur de chaque mot est mémorisée : découper un texte en lignes revient à
+additionner des largeurs déjà connues au lieu de re-mesurer la ligne entière
+à chaque mot ajouté.
+
+fit_text cherche par dichotomie la plus grande taille de police pour
+laquelle le texte, re-découpé à cette taille, tient dans un cadre donné.
+"""
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+from PIL import ImageFont
+
+
+# Hauteur de ligne par rapport à la taille de police (36 px pour du 26, comme les vignettes d'origine)
+LINE_HEIGHT_RATIO = 36 / 26
+
+Layout = namedtuple("Layout", "font size lines line_height")
+
+
+@lru_cache(maxsize=None)
+def get_font(font_path, size):
+    """Police chargée une seule fois par (fichier, taille)."""
+    return ImageFont.truetype(font_path, size)
+
+
+@lru_cache(maxsize=100000)
+def word_width(font_path, size, word):
+    """Largeur d'avance (en pixels) d'un mot ou d'une espace."""
+    return get_font(font_path, size).getlength(word)
+
+
+def _wrap(text, font_path, size, max_width):
+    """Découpe une ligne de texte et retourne (lignes, largeur de la plus longue ligne)."""
+    space = word_width(font_path, size, " ")
+    wrapped_lines = []
+    widest = 0
+    line = []
+    line_width = 0
+    for word in text.split():
+        width = word_width(font_path, size, word)
+        test_width = line_width + space + width if line else width
+        if line and test_width > max_width:
+            wrapped_lines.append(" ".join(line))
+            widest = max(widest, line_width)
+            line = [word]  # Démarre une nouvelle ligne avec le mot actuel
+            line_width = width
+        else:
+            line.append(word)
+            line_width = test_width
+    if line:  # Ajoute la dernière ligne si elle existe
+        wrapped_lines.append(" ".join(line))
+        widest = max(widest, line_width)
+    return wrapped_lines, widest
+
+
+def line_height(size, ratio=LINE_HEIGHT_RATIO):
+    return math.ceil(size * ratio)
+
+
+def _layout(text, font_path, size, max_width):
+    lines = []
+    widest = 0
+    for paragraph in text.split("\n"):
+        paragraph_lines, paragraph_width = _wrap(paragraph, font_path, size, max_width)
+        lines.extend(paragraph_lines)
+        widest = max(widest, paragraph_width)
+    return lines, widest
+
+
+def fit_text(text, font_path, max_width, max_height, max_size, min_size=10, ratio=LINE_HEIGHT_RATIO):
+    """
+    Trouve la plus grande taille de police pour laquelle le texte tient dans max_width x max_height.
+
+    Le texte est re-découpé à chaque taille essayée ; la recherche est une
+    dichotomie sur les tailles entières entre min_size et max_size. Si rien
+    ne tient, la mise en page à min_size est retournée.
+
+    :return: Un Layout (police, taille, lignes, hauteur de ligne)
+    """
+    best = None
+    low, high = min_size, max_size
+    while low <= high:
+        size = (low + high) // 2
+        lines, widest = _layout(text, font_path, size, max_width)
+        if widest <= max_width and len(lines) * line_height(size, ratio) <= max_height:
+            best = (size, lines)
+            low = size + 1
+        else:
+            high = size - 1
+
+    if best is None:
+        best = (min_size, _layout(text, font_path, min_size, max_width)[0])
+    size, lines = best
+    return Layout(get_font(font_path, size), size, lines, line_height(size, ratio))
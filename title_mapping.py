@@ -0,0 +1,89 @@
+"""Fichier CSV de correspondance des titres (titre simplifié -> titre à afficher).
+
+Le fichier est lu une seule fois (le séparateur est détecté par
+csv.Sniffer à ce moment-là) et gardé en mémoire sous forme de dictionnaire.
+Les nouvelles lignes sont mises de côté puis ajoutées en une seule écriture
+atomique par flush() : le contenu existant est recopié tel quel, suivi des
+nouvelles lignes, dans un fichier temporaire qui remplace l'original.
+"""
+import csv
+import io
+import os
+import threading
+
+
+class MappingFile:
+    """Correspondance titre simplifié -> titre, chargée une fois et écrite par lots."""
+
+    def __init__(self, path, header=None, flush_every=None):
+        """
+        :param header: En-tête écrit si le fichier est créé (ex : ['Nom modifié', 'Nom original'])
+        :param flush_every: Écrit automatiquement le fichier toutes les flush_every nouvelles lignes
+        """
+        self.path = path
+        self.header = header
+        self.flush_every = flush_every
+        self.delimiter = ';'
+        self.mapping = {}
+        self.pending = []
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, mode="r", newline='', encoding="utf-8-sig") as fichier_csv:
+                content = fichier_csv.read()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Erreur lors du chargement du fichier {self.path} : {e}")
+            return
+        try:
+            self.delimiter = csv.Sniffer().sniff(content[:1024], delimiters=";,\t").delimiter
+        except csv.Error:
+            pass  # Fichier vide ou d'une seule colonne : séparateur par défaut
+        lecteur = csv.reader(io.StringIO(content), delimiter=self.delimiter)
+        self.mapping = {ligne[0]: ligne[1] for ligne in lecteur if len(ligne) >= 2}
+
+    def __contains__(self, key):
+        return key in self.mapping
+
+    def get(self, key, default=None):
+        return self.mapping.get(key, default)
+
+    def add(self, key, value):
+        """Ajoute une correspondance si la clé est nouvelle ; elle sera écrite au prochain flush()."""
+        with self.lock:
+            if key in self.mapping:
+                return
+            self.mapping[key] = value
+            self.pending.append((key, value))
+            flush_now = self.flush_every is not None and len(self.pending) >= self.flush_every
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """Écrit les nouvelles lignes en une fois (remplacement atomique du fichier)."""
+        with self.lock:
+            if not self.pending:
+                return
+            rows = io.StringIO()
+            writer = csv.writer(rows, delimiter=self.delimiter)
+            try:
+                with open(self.path, mode="rb") as fichier_csv:
+                    existing = fichier_csv.read()
+            except FileNotFoundError:
+                existing = b""
+                if self.header:
+                    writer.writerow(self.header)
+            writer.writerows(self.pending)
+
+            if existing and not existing.endswith(b"\n"):
+                existing += b"\r\n"
+            encoding = "utf-8" if existing else "utf-8-sig"  # BOM pour Excel, uniquement en début de fichier
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, mode="wb") as fichier_csv:
+                fichier_csv.write(existing)
+                fichier_csv.write(rows.getvalue().encode(encoding))
+            os.replace(tmp_path, self.path)
+            self.pending = []
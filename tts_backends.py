@@ -0,0 +1,127 @@
+"""Moteurs de synthèse vocale utilisables pour les titres du pack.
+
+Chaque moteur est une fonction (texte, langue, chemin) qui écrit un mp3 :
+- "gtts" : service en ligne de Google (gTTS), avec limitation du débit et
+  nouvelles tentatives quand le service sature
+- "espeak" : espeak-ng en local, sans réseau
+- "pico" : SVOX pico (pico2wave) en local, voix plus naturelle qu'espeak
+- "fake" : mp3 silencieux déterministe, pour les essais sans réseau ni moteur
+
+Les moteurs locaux produisent un wav, converti en mp3 par lame ou ffmpeg.
+"""
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from gtts import gTTS
+from gtts.tts import gTTSError
+
+GTTS_RATE = 4.0  # Requêtes par seconde
+GTTS_BURST = 8
+MAX_ATTEMPTS = 5
+
+
+class TokenBucket:
+    """Seau à jetons partagé entre threads : rate jetons par seconde, au plus burst d'avance."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Attend qu'un jeton soit disponible et le consomme."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+gtts_limiter = TokenBucket(GTTS_RATE, GTTS_BURST)
+
+
+def configure_gtts(rate):
+    """Change le débit maximal des appels à gTTS (requêtes par seconde)."""
+    global gtts_limiter
+    gtts_limiter = TokenBucket(rate, max(1, int(rate * 2)))
+
+
+def gtts(text, lang, path):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        gtts_limiter.acquire()
+        try:
+            gTTS(text=text, lang=lang).save(path)
+            return
+        except gTTSError as e:
+            status = e.rsp.status_code if e.rsp is not None else None
+            throttled = status == 429 or (status is not None and status >= 500)
+            if not throttled or attempt == MAX_ATTEMPTS:
+                raise
+            delay = 2 ** attempt + random.uniform(0, 1)
+            print(f"Synthèse vocale limitée ({status}), nouvel essai dans {delay:.0f} s")
+            time.sleep(delay)
+
+
+def _run(command):
+    if shutil.which(command[0]) is None:
+        raise RuntimeError(f"Programme introuvable pour la synthèse vocale : {command[0]}")
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def _wav_to_mp3(wav_path, path):
+    if shutil.which("lame"):
+        _run(["lame", "--quiet", "-V", "4", wav_path, path])
+    else:
+        _run(["ffmpeg", "-y", "-loglevel", "error", "-i", wav_path, "-codec:a", "libmp3lame", "-q:a", "4",
+              "-f", "mp3", path])
+
+
+def _local(text, path, command):
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, "tts.wav")
+        _run(command(wav_path))
+        _wav_to_mp3(wav_path, path)
+
+
+def espeak(text, lang, path):
+    # "--" : un titre commençant par "-" ne doit pas être lu comme une option
+    _local(text, path, lambda wav_path: ["espeak-ng", "-v", lang, "-w", wav_path, "--", text])
+
+
+def pico(text, lang, path):
+    # pico2wave attend une langue régionale (fr-FR, en-US...)
+    voice = lang if "-" in lang else f"{lang}-{lang.upper()}"
+    _local(text, path, lambda wav_path: ["pico2wave", "-l", voice, "-w", wav_path, "--", text])
+
+
+# Trame MPEG-1 Layer III vide (128 kbit/s, 44,1 kHz) : se lit comme 26 ms de silence
+_SILENT_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+
+
+def fake(text, lang, path):
+    """Silence dont la durée dépend de la longueur du texte : même texte, même fichier."""
+    with open(path, "wb") as f:
+        f.write(_SILENT_FRAME * (2 * len(text) + 10))
+
+
+BACKENDS = {"gtts": gtts, "espeak": espeak, "pico": pico, "fake": fake}
+
+
+def get(name):
+    """Retourne le moteur de synthèse nommé name."""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Moteur de synthèse vocale inconnu : {name} (disponibles : {', '.join(BACKENDS)})")
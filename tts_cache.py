@@ -0,0 +1,83 @@
+"""Cache persistant de la synthèse vocale, adressé par (texte, langue, moteur).
+
+Chaque texte n'est synthétisé qu'une fois : les mp3 sont rangés sous
+tts/<clé[:2]>/<clé>.mp3 dans le dossier de cache partagé, et une même phrase
+("Que veux tu écouter ?", "Partie, un"...) est ensuite reprise localement
+pour tous les packs et toutes les reconstructions, sans appel réseau.
+
+Le moteur de synthèse (voir tts_backends) fait partie de la clé : il est
+choisi par exécution avec configure(), ou la variable TELMI_TTS_BACKEND.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+
+import tts_backends
+from http_cache import CACHE_DIR
+
+TTS_DIR = os.path.join(CACHE_DIR, "tts")
+
+default_backend = os.environ.get("TELMI_TTS_BACKEND", "gtts")
+
+_lock = threading.Lock()
+# Un verrou par clé : deux demandes identiques simultanées ne synthétisent qu'une fois
+_key_locks = defaultdict(threading.Lock)
+hits = 0
+misses = 0
+
+
+def configure(backend=None, gtts_rate=None):
+    """
+    Choisit le moteur de synthèse utilisé par défaut pour cette exécution.
+
+    :param backend: Nom du moteur ("gtts", "espeak", "pico", "fake")
+    :param gtts_rate: Débit maximal des appels à gTTS (requêtes par seconde)
+    """
+    global default_backend
+    if backend is not None:
+        tts_backends.get(backend)  # Vérifie le nom dès maintenant
+        default_backend = backend
+    if gtts_rate is not None:
+        tts_backends.configure_gtts(gtts_rate)
+
+
+def cache_key(text, lang, backend):
+    payload = json.dumps([text, lang, backend], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(TTS_DIR, key[:2], f"{key}.mp3")
+
+
+def synthesize(text, lang="fr", backend=None):
+    """
+    Retourne le chemin d'un mp3 prononçant text, synthétisé seulement s'il n'est pas déjà en cache.
+
+    :raises Exception: l'erreur du moteur de synthèse si la génération échoue
+    """
+    global hits, misses
+    backend = backend or default_backend
+    key = cache_key(text, lang, backend)
+    path = _entry_path(key)
+    with _lock:
+        key_lock = _key_locks[key]
+    with key_lock:
+        if os.path.exists(path):
+            with _lock:
+                hits += 1
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        tts_backends.get(backend)(text, lang, tmp_path)
+        os.replace(tmp_path, path)
+        with _lock:
+            misses += 1
+    return path
+
+
+def summary():
+    """Résumé des accès au cache depuis le début de l'exécution."""
+    return f"Synthèse vocale : {hits} reprise(s) du cache, {misses} générée(s)"
@@ -1,37 +1,73 @@
 import os
+import shutil
 import sys
-from gtts import gTTS
+from concurrent.futures import ThreadPoolExecutor
 
-def text_to_speech_in_directory(directory):
+import tts_cache
+
+DEFAULT_WORKERS = 8
+
+
+def is_up_to_date(txt_file_path, mp3_file_path):
+    """Le mp3 existe déjà et est plus récent que le texte (conversion précédente interrompue avant la suppression)."""
+    return os.path.exists(mp3_file_path) and os.path.getmtime(mp3_file_path) >= os.path.getmtime(txt_file_path)
+
+
+def convert_file(txt_file_path):
+    """Convertit un fichier texte en mp3 ; le .txt n'est supprimé qu'une fois le mp3 en place."""
+    mp3_file_path = os.path.splitext(txt_file_path)[0] + ".mp3"
+
+    try:
+        if is_up_to_date(txt_file_path, mp3_file_path):
+            print(f"Fichier déjà converti : {mp3_file_path}")
+        else:
+            with open(txt_file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            if content.strip():
+                # Utiliser le français comme langue par défaut
+                tmp_path = f"{mp3_file_path}.tmp"
+                shutil.copyfile(tts_cache.synthesize(content, lang='fr'), tmp_path)
+                os.replace(tmp_path, mp3_file_path)
+                print(f"Fichier converti : {txt_file_path} -> {mp3_file_path}")
+            else:
+                print(f"Le fichier est vide, ignoré : {txt_file_path}")
+
+        os.remove(txt_file_path)
+        print(f"Fichier supprimé : {txt_file_path}")
+        return True
+    except Exception as e:
+        print(f"Erreur lors du traitement du fichier {txt_file_path}: {e}")
+        return False
+
+
+def text_to_speech_in_directory(directory, workers=DEFAULT_WORKERS):
     if not os.path.isdir(directory):
         print(f"Le chemin spécifié n'est pas un répertoire valide : {directory}")
         return
 
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.txt'):
-                txt_file_path = os.path.join(root, file)
-                mp3_file_path = os.path.splitext(txt_file_path)[0] + ".mp3"
+    txt_files = [
+        os.path.join(root, file)
+        for root, _, files in os.walk(directory)
+        for file in files
+        if file.endswith('.txt')
+    ]
 
-                try:
-                    with open(txt_file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
+    # Les conversions tournent en parallèle ; le débit vers gTTS reste limité par tts_cache
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(convert_file, txt_files))
 
-                    if content.strip():
-                        tts = gTTS(content, lang='fr')  # Utiliser le français comme langue par défaut
-                        tts.save(mp3_file_path)
-                        print(f"Fichier converti : {txt_file_path} -> {mp3_file_path}")
-                    else:
-                        print(f"Le fichier est vide, ignoré : {txt_file_path}")
+    echecs = results.count(False)
+    print(f"{len(results) - echecs} fichier(s) traité(s), {echecs} échec(s). {tts_cache.summary()}")
 
-                    os.remove(txt_file_path)
-                    print(f"Fichier supprimé : {txt_file_path}")
-                except Exception as e:
-                    print(f"Erreur lors du traitement du fichier {txt_file_path}: {e}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage : python script.py <dossier>")
+    if len(sys.argv) < 2:
+        print("Usage : python script.py <dossier> [workers=N] [rate=R] [tts=gtts|espeak|pico|fake]")
     else:
         directory = sys.argv[1]
-        text_to_speech_in_directory(directory)
+        workers = next((int(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('workers=')), DEFAULT_WORKERS)
+        rate = next((float(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('rate=')), None)
+        backend = next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('tts=')), None)
+        tts_cache.configure(backend=backend, gtts_rate=rate)
+        text_to_speech_in_directory(directory, workers)
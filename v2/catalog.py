@@ -0,0 +1,243 @@
+"""Catalogue SQLite d'un pack v2 : épisodes, groupes et chemins de leurs fichiers.
+
+Le fichier CSV (séparateur ';') reste la référence modifiable dans Excel :
+il est importé dans la base à l'ouverture s'il a changé depuis le dernier
+export, et ré-écrit à partir de la base après chaque ajout. Entre les deux,
+prepare_pack et create_pack travaillent sur la base indexée : savoir si un
+épisode existe déjà ou trouver le dernier groupe ne demande plus de relire
+tout le CSV.
+
+Les colonnes ajoutées par l'utilisateur après les cinq colonnes du catalogue
+sont conservées telles quelles d'un export à l'autre. Supprimer le CSV remet
+le catalogue à zéro.
+"""
+import csv
+import json
+import os
+import sqlite3
+from collections import Counter, defaultdict, namedtuple
+
+CSV_HEADER = ["Nom de fichier", "Nom de l'épisode", "Nom du groupe", "Numéro Groupe", "Numéro de l'épisode"]
+
+# Les cinq premiers champs sont les colonnes du CSV, dans le même ordre
+Row = namedtuple("Row", "file_name title group_name group_number episode_number image_path audio_path")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    file_name TEXT PRIMARY KEY,
+    title TEXT,
+    group_name TEXT,
+    group_number INTEGER,
+    episode_number INTEGER,
+    image_path TEXT,
+    audio_path TEXT,
+    position INTEGER,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS episodes_group ON episodes (group_number, episode_number);
+CREATE TABLE IF NOT EXISTS groups (
+    number INTEGER PRIMARY KEY,
+    image_path TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def episode_image_path(file_name):
+    return f"images/episodes/{file_name}.jpg"
+
+
+def episode_audio_path(file_name):
+    return f"audios/{file_name}.mp3"
+
+
+def group_image_path(number):
+    return f"images/groupes/{number}.jpg"
+
+
+class Catalog:
+    """Catalogue d'un pack, stocké dans <base_dir>/<titre>.sqlite à côté du CSV <titre>.csv."""
+
+    def __init__(self, base_dir, pack_title):
+        self.base_dir = base_dir
+        self.csv_path = os.path.join(base_dir, f"{pack_title}.csv")
+        self.db = sqlite3.connect(os.path.join(base_dir, f"{pack_title}.sqlite"))
+        self.db.executescript(SCHEMA)
+        self.changed = False  # Épisodes ajoutés depuis le dernier export du CSV
+        self._upgrade_schema()
+        if self._csv_removed():
+            self.reset()
+        elif self._csv_changed():
+            self.import_csv()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def path(self, relative_path):
+        """Chemin absolu d'un fichier du catalogue (les chemins sont relatifs au dossier du pack)."""
+        return os.path.join(self.base_dir, relative_path)
+
+    def _meta(self, name):
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def _upgrade_schema(self):
+        # Bases créées avant la conservation des colonnes supplémentaires du CSV
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(episodes)")]
+        if "extra" not in columns:
+            with self.db:
+                self.db.execute("ALTER TABLE episodes ADD COLUMN extra TEXT")
+
+    def _csv_removed(self):
+        """Le CSV a été supprimé depuis le dernier export : demande de remise à zéro du pack."""
+        return not os.path.isfile(self.csv_path) and self._meta("csv_mtime_ns") is not None
+
+    def reset(self):
+        """Vide le catalogue (épisodes, groupes et colonnes supplémentaires)."""
+        print(f"{self.csv_path} supprimé : le catalogue est remis à zéro.")
+        with self.db:
+            self.db.execute("DELETE FROM episodes")
+            self.db.execute("DELETE FROM groups")
+            self.db.execute("DELETE FROM meta")
+
+    def _csv_changed(self):
+        if not os.path.isfile(self.csv_path):
+            return False
+        return self._meta("csv_mtime_ns") != str(os.stat(self.csv_path).st_mtime_ns)
+
+    def import_csv(self):
+        """
+        Remplace le contenu de la base par celui du CSV (modifié dans Excel par exemple).
+
+        :raises ValueError: Si plusieurs lignes du CSV ont le même nom de fichier
+        """
+        with open(self.csv_path, mode='r', newline='', encoding='utf-8-sig') as csv_file:
+            reader = csv.reader(csv_file, delimiter=';', quotechar='"')
+            header = next(reader, None) or CSV_HEADER
+            rows = []
+            for row in reader:
+                # Lignes vides d'Excel (";;;;"), incomplètes ou sans nom de fichier : ignorées
+                if len(row) < 5 or not row[0].strip():
+                    if any(cell.strip() for cell in row):
+                        print(f"Ligne incomplète ignorée dans {self.csv_path} : {';'.join(row)}")
+                    continue
+                rows.append(row)
+
+        duplicates = sorted(name for name, count in Counter(row[0] for row in rows).items() if count > 1)
+        if duplicates:
+            raise ValueError(f"{self.csv_path} : plusieurs lignes pour le même nom de fichier : {', '.join(duplicates)}")
+
+        with self.db:
+            self.db.execute("DELETE FROM episodes")
+            self.db.execute("DELETE FROM groups")
+            for position, row in enumerate(rows):
+                file_name, title, group_name, group_number, episode_number = row[:5]
+                self.db.execute(
+                    "INSERT INTO episodes (file_name, title, group_name, group_number, episode_number, image_path, "
+                    "audio_path, position, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (file_name, title, group_name, group_number, episode_number,
+                     episode_image_path(file_name), episode_audio_path(file_name), position,
+                     json.dumps(row[5:]) if len(row) > 5 else None),
+                )
+            self.db.execute(
+                "INSERT OR IGNORE INTO groups SELECT DISTINCT group_number, 'images/groupes/' || group_number || '.jpg' "
+                "FROM episodes WHERE typeof(group_number) = 'integer'"
+            )
+            self._set_meta("csv_header", json.dumps(header[5:]))
+            self._set_meta("csv_mtime_ns", str(os.stat(self.csv_path).st_mtime_ns))
+
+    def export_csv(self):
+        """Ré-écrit le CSV à partir de la base (remplacement atomique du fichier)."""
+        tmp_path = f"{self.csv_path}.tmp"
+        with open(tmp_path, mode='w', newline='', encoding='utf-8-sig') as csv_file:  # Compatible avec Excel
+            writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            extra_header = json.loads(self._meta("csv_header") or "[]")
+            writer.writerow(CSV_HEADER + extra_header)
+            for row in self.db.execute(
+                "SELECT file_name, title, group_name, group_number, episode_number, extra FROM episodes ORDER BY position"
+            ):
+                # Colonnes supplémentaires de l'utilisateur, vides pour les épisodes ajoutés depuis
+                writer.writerow(list(row[:5]) + (json.loads(row[5]) if row[5] else [""] * len(extra_header)))
+        os.replace(tmp_path, self.csv_path)
+        with self.db:
+            self._set_meta("csv_mtime_ns", str(os.stat(self.csv_path).st_mtime_ns))
+        self.changed = False
+
+    def contains(self, file_name):
+        return self.db.execute("SELECT 1 FROM episodes WHERE file_name = ?", (file_name,)).fetchone() is not None
+
+    def last_group_and_episode(self):
+        """
+        Numéros du dernier groupe et de son dernier épisode, comme les donnait la relecture du CSV.
+
+        :return: (groupe, épisode) ; (groupe suivant, 1) si le dernier groupe est complet (8 épisodes)
+        """
+        valid = "typeof(group_number) = 'integer' AND typeof(episode_number) = 'integer'"
+        max_groupe = self.db.execute(f"SELECT MAX(group_number) FROM episodes WHERE {valid}").fetchone()[0]
+        if max_groupe is None or max_groupe < 0:
+            return 0, 1
+        max_episode = self.db.execute(
+            f"SELECT MAX(episode_number) FROM episodes WHERE {valid} AND group_number = ?", (max_groupe,)
+        ).fetchone()[0]
+        if max_groupe == 0:
+            max_episode = max(max_episode, 1)
+
+        if max_episode == 8:
+            return max_groupe + 1, 1
+        return max_groupe, max_episode
+
+    def add_episode(self, file_name, title, group_name, group_number, episode_number):
+        """Ajoute un épisode en fin de catalogue (à appeler dans une transaction, voir transaction())."""
+        self.db.execute(
+            "INSERT INTO episodes (file_name, title, group_name, group_number, episode_number, image_path, audio_path, "
+            "position) VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM episodes))",
+            (file_name, title, group_name, group_number, episode_number,
+             episode_image_path(file_name), episode_audio_path(file_name)),
+        )
+        self.db.execute("INSERT OR IGNORE INTO groups VALUES (?, ?)", (group_number, group_image_path(group_number)))
+        self.changed = True
+
+    def transaction(self):
+        """Transaction SQLite : les ajouts sont tous enregistrés, ou aucun en cas d'erreur."""
+        return self.db
+
+    def episode_image(self, file_name):
+        """Chemin absolu de l'image d'un épisode."""
+        return self.path(episode_image_path(file_name))
+
+    def episode_audio(self, file_name):
+        """Chemin absolu du mp3 d'un épisode."""
+        return self.path(episode_audio_path(file_name))
+
+    def group_image(self, number):
+        """Chemin absolu de l'image d'un groupe."""
+        row = self.db.execute("SELECT image_path FROM groups WHERE number = ?", (number,)).fetchone()
+        return self.path(row[0] if row else group_image_path(number))
+
+    def groups(self):
+        """
+        Épisodes regroupés par numéro de groupe (lignes aux numéros non entiers ignorées).
+
+        :return: Dictionnaire numéro de groupe -> liste de (numéro d'épisode, Row)
+        """
+        groupes = defaultdict(list)
+        for row in self.db.execute(
+            "SELECT file_name, title, group_name, group_number, episode_number, image_path, audio_path "
+            "FROM episodes WHERE typeof(group_number) = 'integer' AND typeof(episode_number) = 'integer' "
+            "ORDER BY position"
+        ):
+            row = Row(*row)
+            groupes[row.group_number].append((row.episode_number, row))
+        return groupes
@@ -1,12 +1,17 @@
 
-import csv
 import os
-from collections import defaultdict
 import sys
 import shutil
-from PIL import Image, ImageDraw, ImageFont
-from gtts import gTTS  # Importer gTTS pour la synthèse vocale
-import textwrap
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Les modules partagés (rendu des images...) sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import file_placement
+import image_render
+import tts_cache
+from catalog import Catalog
+from task_graph import TaskGraph
 
 screen_size = (640, 480)
 cover_size = (480, 480)
@@ -17,36 +22,99 @@ pastel_colors = [
     (204, 204, 255), (153, 204, 255), (204, 255, 255),
     (153, 255, 204), (204, 255, 204), (204, 255, 153),
 ]
+render_pool = None
+task_graph = None
+NET_WORKERS = 8  # Synthèses vocales simultanées (le débit vers gTTS reste limité par tts_cache)
+DISK_WORKERS = 4
 
-def find_first_available_integer(directory):
+class PackTree:
     """
-    Parcourt les noms des dossiers dans le répertoire donné, 
-    et retourne le premier entier disponible en partant de 0.
+    Arborescence du pack tenue en mémoire pendant la planification.
 
-    :param directory: Chemin du répertoire à analyser
-    :return: Le premier entier disponible
+    Remplace la relecture du disque (os.listdir) à chaque nouveau dossier :
+    le premier numéro libre d'un dossier est suivi par un compteur qui ne
+    fait qu'avancer, puisque aucun dossier n'est jamais supprimé.
     """
-    try:
-        # Récupérer les noms des dossiers dans le répertoire
-        folder_names = [
-            int(name) for name in os.listdir(directory)
-            if os.path.isdir(os.path.join(directory, name)) and name.isdigit()
-        ]
-        
-        # Trier les entiers pour identifier les lacunes
-        folder_names.sort()
+
+    def __init__(self):
+        self.children = defaultdict(set)
+        self.next_free = defaultdict(int)
+
+    def first_available_integer(self, directory):
+        """Premier numéro de sous-dossier libre dans directory, en partant de 0."""
+        number = self.next_free[directory]
+        while number in self.children[directory]:
+            number += 1
+        self.next_free[directory] = number
+        return number
+
+    def exists(self, path):
+        parent, _, name = path.rpartition("/")
+        return name.isdigit() and int(name) in self.children[parent]
+
+    def add(self, path):
+        parent, _, name = path.rpartition("/")
+        self.children[parent].add(int(name))
+
+
+# Étapes du plan, dans l'ordre où elles sont matérialisées (chemins relatifs au dossier du pack)
+PlannedGroup = namedtuple("PlannedGroup", "path title image_source card_text number")
+PlannedEpisode = namedtuple("PlannedEpisode", "path row")
+
+
+def plan_pack(catalog):
+    """
+    Calcule toute l'arborescence du pack sans toucher au disque.
+
+    :return: (dossier du choix, liste de PlannedGroup et PlannedEpisode)
+    """
+    tree = PackTree()
+    choice_dir = f"{tree.first_available_integer('')}"
+    tree.add(choice_dir)
+    steps = []
+
+    # Épisodes regroupés par numéro de groupe, lus dans le catalogue (qui importe le CSV s'il a été modifié)
+    groupes = catalog.groups()
+    group_folders = {}
+
+    # Trier les groupes par numéro de groupe croissant
+    for numero_groupe in sorted(groupes.keys()):
+        # Trier les épisodes au sein du groupe par numéro d'épisode croissant
+        episodes_tries = sorted(groupes[numero_groupe], key=lambda x: x[0])
         
-        # Trouver le premier entier manquant
-        expected = 0
-        for folder in folder_names:
-            if folder != expected:
-                return expected
-            expected += 1
+        if not numero_groupe in group_folders:
+            group_folders[numero_groupe] = tree.first_available_integer(choice_dir)
+
+        for _, ligne in episodes_tries:
         
-        # Si aucun entier n'est manquant, le prochain disponible est celui après le dernier
-        return f"{expected}"
-    except Exception as e:
-        raise RuntimeError(f"Une erreur est survenue : {e}")
+            no_group = not ligne[2].strip()
+            groupe_path = choice_dir if no_group else f"{choice_dir}/{group_folders[numero_groupe]}"
+            
+            if not no_group and not tree.exists(groupe_path):
+                tree.add(groupe_path)
+                image_source = catalog.group_image(numero_groupe)
+                if os.path.exists(image_source):
+                    steps.append(PlannedGroup(groupe_path, ligne[2], image_source, None, numero_groupe))
+                else:
+                    texte = "- " + "\n- ".join([ligne[1] for _, ligne in episodes_tries])
+                    steps.append(PlannedGroup(groupe_path, ligne[2], None, texte, numero_groupe))
+            
+            episode_path = f"{groupe_path}/{tree.first_available_integer(groupe_path)}"
+            tree.add(episode_path)
+            steps.append(PlannedEpisode(episode_path, ligne))
+
+    return choice_dir, steps
+
+
+def print_plan(choice_dir, steps):
+    print(f"{choice_dir} : choix des épisodes")
+    for step in steps:
+        if isinstance(step, PlannedGroup):
+            image = step.image_source or "vignette texte"
+            print(f"{step.path} : groupe {step.number} « {step.title} » ({image})")
+        else:
+            print(f"{step.path} : épisode « {step.row.title} » ({step.row.audio_path})")
+
 
 def read_txt_file(file_path):
  
@@ -57,228 +125,151 @@ def read_txt_file(file_path):
     except FileNotFoundError:
         print(f"Le fichier '{file_path}' n'existe pas.")
 
-def generate_audio_file(text, output_path):
+def synthesize(text):
     print(f"Génération de l'audio pour : {text}")
+    # Une phrase déjà synthétisée (par ce pack ou un autre) est reprise du cache
+    return tts_cache.synthesize(text, lang='fr')
+
+def copy_audio_file(source_path, output_path):
+    shutil.copyfile(source_path, output_path)
+    print(f"Fichier audio généré : {output_path}")
+
+def write_file(output_path, data):
+    with open(output_path, "wb") as f:
+        f.write(data)
+
+def write_files(output_paths, datas):
+    # Une source rendue en plusieurs tailles
+    for output_path, data in zip(output_paths, datas):
+        write_file(output_path, data)
+
+def submit_render(fn, label, *args, **kwargs):
+    """Envoie un rendu au pool de rendu (cache de rendu compris) ; label l'identifie dans les erreurs."""
+    return render_pool.submit(label, fn, *args, **kwargs)
+
+def generate_audio_file(text, output_path, after=()):
+    """Planifie la synthèse de text (réseau) puis sa copie en output_path (disque)."""
+    speech = task_graph.add(f"la génération de l'audio « {text} »", "net", synthesize, text)
+    return task_graph.add(f"l'écriture de {output_path}", "disk", copy_audio_file, speech, output_path, after=after)
+
+def resize_image(input_path, output_path, size, text=None, after=()):
+    """Planifie le redimensionnement d'une image (calcul) puis son écriture (disque)."""
+    image = task_graph.add(f"le rendu de {output_path}", "cpu", image_render.render_resized, output_path,
+                           input_path, size, text, font_path, fit="contain")
+    return task_graph.add(f"l'écriture de {output_path}", "disk", write_file, output_path, image, after=after)
+
+
+def resize_image_many(input_path, outputs, after=()):
+    """Planifie plusieurs tailles d'une même image (liste de (output_path, taille)), décodée une seule fois."""
+    output_paths = tuple(output_path for output_path, _ in outputs)
+    targets = [(size, None, "contain", None) for _, size in outputs]
+    images = task_graph.add(f"le rendu de {input_path}", "cpu", image_render.render_resized_many, output_paths,
+                            input_path, targets, font_path)
+    return task_graph.add(f"l'écriture des images de {input_path}", "disk", write_files, output_paths, images,
+                          after=after)
+
+
+def create_group_image(output_path, text, group_number, after=()):
+    """Planifie la création de la vignette d'un groupe (calcul) puis son écriture (disque)."""
+    background_color = pastel_colors[group_number % len(pastel_colors)]
+    image = task_graph.add(f"le rendu de {output_path}", "cpu", image_render.render_text_card, output_path,
+                           text, background_color, screen_size, font_path)
+    return task_graph.add(f"l'écriture de {output_path}", "disk", write_file, output_path, image, after=after)
+
+
+def create_pack(pack_title, dry_run=False):
+    global render_pool
+    global task_graph
+
+    if dry_run:
+        # Affiche le plan du pack sans rien écrire
+        base_dir = os.path.join(os.getcwd(), f"output/{pack_title}")
+        with Catalog(base_dir, pack_title) as catalog:
+            print_plan(*plan_pack(catalog))
+        return
+
+    # Chaque ressource a son pool : les images sont rendues par des processus pendant
+    # que la synthèse vocale attend le réseau et que les fichiers sont écrits
+    render_pool = image_render.RenderPool(font_path)
+    net_pool = ThreadPoolExecutor(max_workers=NET_WORKERS)
+    disk_pool = ThreadPoolExecutor(max_workers=DISK_WORKERS)
+    task_graph = TaskGraph({"cpu": submit_render, "net": net_pool.submit, "disk": disk_pool.submit})
     try:
-        tts = gTTS(text=text, lang='fr')
-        tts.save(output_path)
-        print(f"Fichier audio généré : {output_path}")
-    except Exception as e:
-        print(f"Erreur lors de la génération de l'audio : {e}")
-
-def resize_image(input_path, output_path, size, text=None):
-    global font_path
-    with Image.open(input_path) as img:
-        # Calcul du ratio de l'image et du cadre cible
-        img_ratio = img.width / img.height
-        target_ratio = size[0] / size[1]
-
-        # Redimensionner pour s'adapter au cadre cible tout en respectant les proportions
-        if img_ratio > target_ratio:
-            # L'image est plus large que le cadre cible : ajuster en largeur
-            new_width = size[0]
-            new_height = int(size[0] / img_ratio)
-        else:
-            # L'image est plus haute que le cadre cible : ajuster en hauteur
-            new_height = size[1]
-            new_width = int(size[1] * img_ratio)
-
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-        # Créer un fond noir pour le cadre cible
-        background = Image.new("RGB", size, (0, 0, 0))
-
-        # Centrer l'image dans le fond
-        x_offset = (size[0] - new_width) // 2
-        y_offset = (size[1] - new_height) // 2
-        background.paste(img, (x_offset, y_offset))
-    
-        if text is not None:
-            draw = ImageDraw.Draw(background)
-            font = ImageFont.truetype(font_path, 36)
-
-            # Calculer la taille du texte
-            wrapped_text = textwrap.fill(text, width=45)  # Ajustez la largeur selon vos besoins
-            bbox = draw.textbbox((0, 0), wrapped_text, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            padding = 10
-            box_width = 640
-            box_height = text_height + padding * 2
-
-            # Créer un cadre semi-transparent
-            transparency = 200
-            box = Image.new("RGBA", (box_width, box_height), (255, 255, 255, transparency))
-            draw_box = ImageDraw.Draw(box)
-            draw_box.rectangle([0, 0, box_width, box_height], fill=(255, 255, 255, transparency))
-          
-
-            # Ajouter le cadre à l'image
-            box_x = size[0] // 2 - box_width // 2
-            box_y = size[1] - box_height - 20
-            background.paste(box, (box_x, box_y), box)
-
-            # Ajouter le texte centré dans le cadre
-            text_x = size[0] // 2 - text_width // 2
-            text_y = box_y
-            draw.text((text_x, text_y), wrapped_text, fill="black", font=font)
-
-        background.save(output_path)
-
-
-
-def create_group_image(output_path, text, group_number):
-    global pastel_colors
-    global screen_size
-    global font_path
-
-    try:
-        background_color = pastel_colors[group_number % len(pastel_colors)]
-        img = Image.new("RGB", screen_size, background_color)
-        draw = ImageDraw.Draw(img)
-        font = ImageFont.truetype(font_path, size=26)
-
-        margin = 19
-        max_width = 640  # Largeur maximale en pixels pour une ligne de texte
-        available_height = screen_size[1] - 2 * margin
-        line_height = 36
-
-        # Fonction pour ajuster le texte en fonction de la largeur maximale
-        def wrap_text(text, max_width, font):
-            wrapped_lines = []
-            words = text.split()
-            line = ""
-            for word in words:
-                test_line = f"{line} {word}".strip()
-                bbox = draw.textbbox((0, 0), test_line, font=font)
-                if bbox[2] > (max_width - 2 * margin):  # Vérifie si la largeur dépasse max_width
-                    wrapped_lines.append(line)
-                    line = word  # Démarre une nouvelle ligne avec le mot actuel
-                else:
-                    line = test_line
-            if line:  # Ajoute la dernière ligne si elle existe
-                wrapped_lines.append(line)
-            return wrapped_lines
-
-        # Découpe le texte pour qu'il tienne dans la largeur spécifiée
-        text_lines = []
-        for line in text.split('\n'):
-            text_lines.extend(wrap_text(line, max_width, font))
-
-        # Calcule la hauteur totale et ajuste la taille de la police si nécessaire
-        total_text_height = line_height * len(text_lines)
-        if total_text_height > available_height:
-            font_size = int(font.size * available_height / total_text_height)
-            font = ImageFont.truetype(font_path, font_size)
-            line_height = font_size
-            total_text_height = line_height * len(text_lines)
-
-        # Calcule l'espacement vertical entre les lignes
-        spacing = (available_height - total_text_height) / (len(text_lines) + 1)
-        y_offset = margin
-
-        # Dessine le texte sur l'image
-        for line in text_lines:
-            draw.text((margin, y_offset), line, font=font, fill="black")
-            y_offset += line_height + spacing
-
-        # Sauvegarde l'image générée
-        img.save(output_path)
-
-    except Exception as e:
-        print(f"Erreur lors de la création de l'image : {e}")
-
-def create_pack(pack_title):
+        build_pack(pack_title)
+        failed, skipped = task_graph.run()
+    finally:
+        render_pool.wait()
+        render_pool.shutdown()
+        net_pool.shutdown()
+        disk_pool.shutdown()
+    # Les erreurs de rendu sont déjà affichées par le pool de rendu
+    for task in failed:
+        if task.resource != "cpu":
+            print(f"Erreur lors de {task.name} : {task.error}")
+    if skipped:
+        print(f"{len(skipped)} tâche(s) abandonnée(s) à la suite d'une erreur")
+    print(tts_cache.summary())
+    print(file_placement.summary())
+
+
+def build_pack(pack_title):
+    """Construit le graphe des tâches du pack ; elles sont exécutées ensuite par create_pack."""
     global cover_size
     global screen_size
 
     base_dir = os.path.join(os.getcwd(), f"output/{pack_title}")
-    csv_path = os.path.join(base_dir, f"{pack_title}.csv")
     pack_path = os.path.join(base_dir, pack_title)
     pack_image_path = os.path.join(base_dir, "podcast.jpg")
+
+    # Toute l'arborescence est calculée en mémoire avant de planifier les tâches
+    with Catalog(base_dir, pack_title) as catalog:
+        choice_name, steps = plan_pack(catalog)
     
     if os.path.exists(pack_path):
         shutil.rmtree(pack_path)
     os.makedirs(pack_path)
     
-    resize_image(pack_image_path, os.path.join(pack_path, "cover.jpg"), cover_size)
-    resize_image(pack_image_path, os.path.join(pack_path, "main-title.jpg"), screen_size)
-    
     generate_audio_file(read_txt_file(os.path.join(base_dir, "podcast.txt")), os.path.join(pack_path, "main-title.mp3"))
     
-    choice_dir =  os.path.join(pack_path, find_first_available_integer(pack_path))
-    os.makedirs(choice_dir)
-    resize_image(pack_image_path, os.path.join(choice_dir, "title.jpg"), screen_size)
-    generate_audio_file("Que veux tu écouter ?", os.path.join(choice_dir, "title.mp3"))
-    
-    # Dictionnaire pour regrouper les lignes par numéro de groupe
-    groupes = defaultdict(list)
-
-    with open(csv_path, mode='r', newline='', encoding='utf-8-sig') as csv_file:
-        reader = csv.reader(csv_file, delimiter=';', quotechar='"')
-        
-        # Ignorer les en-têtes
-        next(reader, None)
-
-        for row in reader:
-            if len(row) < 5:  # S'assurer que la ligne a au moins 5 colonnes
-                continue
-
-            try:
-                # Extraction des numéros de groupe (colonne 4) et d'épisode (colonne 5)
-                numero_groupe = int(row[3])  # Index 3 pour la colonne 4
-                numero_episode = int(row[4])  # Index 4 pour la colonne 5
-            except ValueError:
-                continue  # Ignorer les lignes avec des valeurs non valides
-
-            # Ajouter la ligne au groupe correspondant
-            groupes[numero_groupe].append((numero_episode, row))
-
-    group_folders = {}
-
-    # Trier les groupes par numéro de groupe croissant
-    for numero_groupe in sorted(groupes.keys()):
-        # Trier les épisodes au sein du groupe par numéro d'épisode croissant
-        episodes_tries = sorted(groupes[numero_groupe], key=lambda x: x[0])
-        
-        if not numero_groupe in group_folders:
-            group_folders[numero_groupe] = find_first_available_integer(choice_dir)
-        
-        
-        #print(f"Groupe {numero_groupe}:")
-        
-       
-        for _, ligne in episodes_tries:
-        
-            no_group = not ligne[2].strip()
-            groupe_path = choice_dir if no_group else os.path.join(choice_dir, f"{group_folders[numero_groupe]}")
-            
-            if not no_group:
-                if not os.path.exists(groupe_path):
-                    os.makedirs(groupe_path)
-                    generate_audio_file(ligne[2], os.path.join(groupe_path, "title.mp3"))
-                    group_image_path = os.path.join(groupe_path, "title.png")
-                    if os.path.exists(os.path.join(base_dir,f"images/groupes/{numero_groupe}.jpg")):
-                        resize_image(os.path.join(base_dir,f"images/groupes/{numero_groupe}.jpg"), group_image_path, screen_size, ligne[2])
-                    else:
-                        texte = "- " + "\n- ".join([ligne[1] for _, ligne in episodes_tries])
-                        create_group_image(group_image_path, texte, numero_groupe)
-            
-            episode_path =  os.path.join(groupe_path, f"{find_first_available_integer(groupe_path)}")
-            os.makedirs(episode_path)
-            resize_image(os.path.join(base_dir,f"images/episodes/{ligne[0]}.jpg"), os.path.join(episode_path, "title.png"), screen_size, ligne[1])
-            generate_audio_file(ligne[1], os.path.join(episode_path, "title.mp3"))
-            shutil.copy(os.path.join(base_dir,f"audios/{ligne[0]}.mp3"), os.path.join(episode_path, "story.mp3"))
-            
-            
-
-            #print(f"  - Episode {ligne[4]}: {ligne}")
+    choice_dir = os.path.join(pack_path, choice_name)
+    # Dossier -> tâche qui le crée : un dossier n'est créé qu'après son parent, un fichier qu'après son dossier
+    folders = {choice_name: task_graph.add(f"la création de {choice_dir}", "disk", os.mkdir, choice_dir)}
+    # podcast.jpg n'est décodé qu'une fois pour la couverture, le titre et le choix
+    resize_image_many(pack_image_path, [
+        (os.path.join(pack_path, "cover.jpg"), cover_size),
+        (os.path.join(pack_path, "main-title.jpg"), screen_size),
+        (os.path.join(choice_dir, "title.jpg"), screen_size),
+    ], after=[folders[choice_name]])
+    generate_audio_file("Que veux tu écouter ?", os.path.join(choice_dir, "title.mp3"), after=[folders[choice_name]])
+
+    for step in steps:
+        step_path = os.path.join(pack_path, step.path)
+        parent = folders[step.path.rpartition("/")[0]]
+        folder = folders[step.path] = task_graph.add(f"la création de {step_path}", "disk", os.mkdir, step_path,
+                                                     after=[parent])
+
+        if isinstance(step, PlannedGroup):
+            generate_audio_file(step.title, os.path.join(step_path, "title.mp3"), after=[folder])
+            # L'extension suit l'encodage : JPEG pour une photo, PNG pour une vignette texte
+            if step.image_source:
+                resize_image(step.image_source, os.path.join(step_path, f"title{image_render.PHOTO_EXTENSION}"), screen_size, step.title, after=[folder])
+            else:
+                create_group_image(os.path.join(step_path, f"title{image_render.CARD_EXTENSION}"), step.card_text, step.number, after=[folder])
+        else:
+            ligne = step.row
+            resize_image(catalog.path(ligne.image_path), os.path.join(step_path, f"title{image_render.PHOTO_EXTENSION}"), screen_size, ligne[1], after=[folder])
+            generate_audio_file(ligne[1], os.path.join(step_path, "title.mp3"), after=[folder])
+            # Lien physique (ou clone) quand c'est possible : le mp3 n'est pas dupliqué
+            task_graph.add(f"le placement de {ligne.audio_path}", "disk", file_placement.place,
+                           catalog.path(ligne.audio_path), os.path.join(step_path, "story.mp3"), after=[folder])
             
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python script.py <rss_feed_url>")
+    if len(sys.argv) < 2:
+        print("Usage: python script.py <pack_title> [tts=gtts|espeak|pico|fake] [placement=auto|hardlink|reflink|copy_range|copy] [dry_run]")
         sys.exit(1)
 
     pack_title = sys.argv[1]
-    create_pack(pack_title)
\ No newline at end of file
+    tts_cache.configure(backend=next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('tts=')), None))
+    file_placement.configure(next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('placement=')), None))
+    create_pack(pack_title, dry_run='dry_run' in sys.argv)
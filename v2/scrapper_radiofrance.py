@@ -1,15 +1,22 @@
 import requests
-from bs4 import BeautifulSoup
-from PIL import Image
-from io import BytesIO
+import sys
 import os
-import csv
 import argparse
 import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Les modules partagés (client HTTP, caches...) sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asset_store
+import page_crawler
+import radiofrance_html
 
 # Dossiers pour les images et les fichiers audio
 os.makedirs('images', exist_ok=True)
 
+# Images d'épisodes téléchargées en même temps
+DEFAULT_IMAGE_WORKERS = 8
+
 
 def sanitize_filename(name):
     return re.sub(r'[^a-zA-Z0-9]', '_', name)
@@ -29,51 +36,38 @@ def download_image(url, save_path):
         print(f"Image déjà existante: {save_path}, téléchargement ignoré.")
         return True
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        with open(save_path, 'wb') as f:
-            for chunk in response.iter_content(1024):
-                f.write(chunk)
+        asset_store.place(url, save_path)
         return True
-    except requests.RequestException as e:
+    except (requests.RequestException, OSError) as e:
         print(f"Erreur lors du téléchargement de l'image {url}: {e}")
         return False
 
-def download_episodes(base_url):
-    """Étape 1 : Téléchargement des images et des audios des épisodes."""
-    page_number = 1
-    total_file_count = 0
+def download_episodes(base_url, window=page_crawler.DEFAULT_WINDOW, image_workers=DEFAULT_IMAGE_WORKERS):
+    """
+    Étape 1 : Téléchargement des images et des audios des épisodes.
+
+    Plusieurs pages de la liste sont demandées à la fois (window), et les images
+    sont téléchargées par un pool séparé pendant que les pages suivantes arrivent.
+    """
     encountered_titles = set()  # Ensemble pour suivre les titres rencontrés
+    image_jobs = []
+
+    with ThreadPoolExecutor(max_workers=image_workers) as image_pool:
+        for page_number, episodes in page_crawler.crawl(base_url, radiofrance_html.extract_episodes, window):
+            print(f"Traitement de la page {page_number}...")
+
+            # Si aucune épisode n'est trouvé, sortir de la boucle
+            if episodes is None:
+                break
 
-    while True:
-        # Construire l'URL de la page en cours
-        url = f"{base_url}{page_number}"
-        print(f"Traitement de la page {page_number}...")
-
-        # Effectuer une requête GET pour récupérer le contenu de la page
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Trouver la liste des épisodes
-        episodes = soup.find('ul', class_='Collection-section-items')
-
-        # Si aucune épisode n'est trouvé, sortir de la boucle
-        if not episodes:
-            break
-
-        # Parcourir chaque épisode
-        for item in episodes.find_all('li', class_='Collection-section-items-item'):
-            picture = item.find('picture')
-            img_src = picture.find('source')['srcset'] if picture else None
-            
-            title_span = item.find('span', class_='CardTitle')
-            title = title_span.find('a').text.strip() if title_span and title_span.find('a') else None
-            
-            if img_src and title:
+            # Parcourir chaque épisode
+            termine = False
+            for title, img_src in episodes:
                 # Si le titre a déjà été rencontré, arrêter complètement le traitement
                 if title in encountered_titles:
                     print(f"Le titre '{title}' a déjà été rencontré. Arrêt complet.")
-                    return  # Arrêter la boucle principale
+                    termine = True
+                    break
                 
                 encountered_titles.add(title)  # Ajouter le titre à l'ensemble
 
@@ -83,21 +77,25 @@ def download_episodes(base_url):
                 # Vérifier et télécharger l'image
                 img_filename = f'output/images/{safe_title}.jpg'
                 if not os.path.isfile(img_filename):
-                    download_image(img_src, img_filename)
+                    image_jobs.append(image_pool.submit(download_image, img_src, img_filename))
 
-        page_number += 1
+            if termine:
+                break
 
+    total_file_count = sum(1 for job in image_jobs if job.result())
     print(f"Total de fichiers traités : {total_file_count}")
 
 def main():
     """Point d'entrée principal."""
     parser = argparse.ArgumentParser(description="Scrape un site pour télécharger des podcasts.")
     parser.add_argument("base_url", type=str, help="URL de base pour scraper les épisodes (exemple : 'https://www.radiofrance.fr/franceinter/podcasts/les-odyssees?p=')")
+    parser.add_argument("--pages", type=int, default=page_crawler.DEFAULT_WINDOW, help="Nombre de pages de la liste demandées en même temps")
+    parser.add_argument("--image-workers", type=int, default=DEFAULT_IMAGE_WORKERS, help="Nombre d'images téléchargées en même temps")
     args = parser.parse_args()
 
     print("Début du script.")
     # Télécharger les épisodes
-    download_episodes(args.base_url+"?p=")
+    download_episodes(args.base_url+"?p=", args.pages, args.image_workers)
     print("Script terminé.")
 
 if __name__ == "__main__":